@@ -7,3 +7,12 @@ END_DATE = "2024-12-31"
 # Date boundaries for splitting the data into training, validation, and test sets
 TRAIN_END_DATE = "2023-01-01"  # training data: dates before this date
 VAL_END_DATE = "2024-10-01"    # validation data: dates from TRAIN_END_DATE (inclusive) to VAL_END_DATE (exclusive)
+
+# On-disk cache for FMP API responses (set FMP_CACHE_DIR to None to disable)
+FMP_CACHE_DIR = ".fmp_cache"
+FMP_CACHE_TTL = 24 * 3600       # seconds, financial statements and other endpoints
+FMP_PRICE_CACHE_TTL = 3600      # seconds, historical prices
+
+# On-disk cache for calculated factors, keyed by a hash of their inputs. Off by default:
+# entries are loaded with pickle, so only set this to a directory you trust.
+FACTOR_CACHE_DIR = None
@@ -1,32 +1,226 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import numpy as np
 
+# orjson parses the large FMP payloads several times faster than the standard library;
+# it is optional and json is used when it is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _loads(content):
+    """
+    Parse a JSON document given as bytes.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # orjson is strict JSON; fall back for documents with NaN/Infinity literals.
+            pass
+    return json.loads(content)
+
+# Non-numeric fields of the historical price records.
+PRICE_TEXT_FIELDS = frozenset({'date', 'label'})
+
 class FMPWrapper:
-    def __init__(self, api_key):
+    def __init__(self, api_key, cache_dir=None, cache_ttl=24 * 3600, price_cache_ttl=3600, pool_size=32,
+                 max_concurrent_requests=None, memo_size=128):
         """
         Initialize the FMPWrapper class with the API key and base URL.
+
+        All requests go through one keep-alive session whose connection pool holds up to
+        pool_size connections, so concurrent callers reuse TLS connections instead of
+        opening a new one per request. If max_concurrent_requests is given, at most that many
+        requests are in flight at once across all threads sharing the instance, to stay under
+        the API rate limit.
+
+        If cache_dir is given, successful responses are stored there as JSON files and reused
+        for cache_ttl seconds (price_cache_ttl for historical prices). The memo_size most recently
+        used responses are also kept in memory, for the same time.
         """
         self.api_key = api_key
         self.base_url = "https://financialmodelingprep.com/api/v3"
+        self.stable_url = "https://financialmodelingprep.com/stable"
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+        self._request_slots = (threading.BoundedSemaphore(max_concurrent_requests) if max_concurrent_requests
+                               else contextlib.nullcontext())
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.price_cache_ttl = price_cache_ttl
+        # Responses already fetched by this instance as (fetch time, data), least recently used
+        # first, so repeated requests are made only once; the lock guards it across threads.
+        self.memo_size = memo_size
+        self._responses = OrderedDict()
+        self._responses_lock = threading.Lock()
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _request_key(self, endpoint, params):
+        """
+        Build a stable key for a request. The API key is not part of the key.
+        """
+        return json.dumps([endpoint, sorted(params.items())], default=str)
+
+    def _remembered(self, request_key, ttl):
+        """
+        Return the response memoized for request_key, or None if there is none or it is older than ttl.
+        """
+        with self._responses_lock:
+            entry = self._responses.get(request_key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > ttl:
+                del self._responses[request_key]
+                return None
+            self._responses.move_to_end(request_key)
+            return entry[1]
+
+    def _remember(self, request_key, data):
+        """
+        Memoize a response, dropping the least recently used beyond memo_size.
+        """
+        with self._responses_lock:
+            self._responses[request_key] = (time.monotonic(), data)
+            self._responses.move_to_end(request_key)
+            while len(self._responses) > self.memo_size:
+                self._responses.popitem(last=False)
+
+    def _cache_path(self, request_key):
+        """
+        Build the cache file path for a request key.
+        """
+        return os.path.join(self.cache_dir, hashlib.md5(request_key.encode("utf-8")).hexdigest() + ".json")
 
-    def _make_request(self, endpoint, params=None):
+    def _read_cache(self, path, ttl=None):
         """
-        Internal method to make API requests.
+        Return the cached payload at path, or None if it is missing, older than ttl or unreadable.
+        """
+        try:
+            if ttl is not None and time.time() - os.path.getmtime(path) > ttl:
+                return None
+            with open(path, "rb") as f:
+                return _loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _read_meta(self, path):
+        """
+        Return the validators (ETag, body digest) stored next to a cached payload.
+        """
+        try:
+            with open(f"{path}.meta", "rb") as f:
+                return _loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def _revalidate_cache(self, path):
+        """
+        Mark a cached payload as fresh again and return it, or None if it cannot be read.
+        """
+        data = self._read_cache(path)
+        if data is not None:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return data
+
+    def _write_cache(self, path, content, meta):
+        """
+        Atomically write a raw response body and its validators; failures only cost a future cache miss.
+
+        The old validators are removed first and the new ones written only once the body is in
+        place, so validators never describe a body that was not saved.
+        """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(f"{path}.meta")
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8"))
+            os.replace(tmp_path, f"{path}.meta")
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+    def _make_request(self, endpoint, params=None, base_url=None):
+        """
+        Internal method to make API requests, to base_url (the v3 API by default).
+
+        With a cache_dir, an expired entry is revalidated rather than replaced: the request carries
+        the stored ETag, and a 304 or a body with the same digest just extends the entry's lifetime.
         """
         if params is None:
             params = {}
+        # Endpoints outside the v3 API are keyed by their full URL, so they never collide with it.
+        request_key = self._request_key(endpoint if base_url is None else f"{base_url}/{endpoint}", params)
+        ttl = self.price_cache_ttl if endpoint.startswith("historical-price-full/") else self.cache_ttl
+        remembered = self._remembered(request_key, ttl)
+        if remembered is not None:
+            return remembered
+        cache_path = None
+        meta = {}
+        if self.cache_dir is not None:
+            cache_path = self._cache_path(request_key)
+            cached = self._read_cache(cache_path, ttl)
+            if cached is not None:
+                self._remember(request_key, cached)
+                return cached
+            meta = self._read_meta(cache_path)
         params['apikey'] = self.api_key
-        url = f"{self.base_url}/{endpoint}"
-        response = requests.get(url, params=params)
+        url = f"{base_url or self.base_url}/{endpoint}"
+        headers = {"If-None-Match": meta["etag"]} if meta.get("etag") else None
+        with self._request_slots:
+            response = self.session.get(url, params=params, headers=headers)
+        if response.status_code == 304:
+            cached = self._revalidate_cache(cache_path)
+            if cached is not None:
+                self._remember(request_key, cached)
+                return cached
+            # The stale entry is gone; fetch the full body instead.
+            with self._request_slots:
+                response = self.session.get(url, params=params)
         if response.status_code == 200:
-            return response.json()
+            content = response.content
+            if cache_path is not None:
+                digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+                cached = self._revalidate_cache(cache_path) if digest == meta.get("digest") else None
+                if cached is not None:
+                    self._remember(request_key, cached)
+                    return cached
+                self._write_cache(cache_path, content, {"etag": response.headers.get("ETag"), "digest": digest})
+            data = _loads(content)
+            self._remember(request_key, data)
+            return data
         else:
             response.raise_for_status()
 
-    def get_historical_price(self, ticker, start_date, end_date):
+    def get_historical_price(self, ticker, start_date, end_date, columns=None, dtype=np.float64, oldest_first=False):
         """
         Fetch historical price data for a given ticker and date range.
+
+        Numeric fields are read straight into preallocated arrays of the given dtype, which may
+        also be a dict of dtypes by field (float64 for fields it leaves out); dates and labels
+        stay strings. If columns is given, only those fields are built. Rows come newest
+        first as returned by the API, or oldest first with oldest_first=True.
         """
         endpoint = f"historical-price-full/{ticker}"
         params = {
@@ -35,7 +229,37 @@ class FMPWrapper:
         }
         data = self._make_request(endpoint, params)
         if "historical" in data:
-            return pd.DataFrame(data["historical"])
+            historical = data["historical"]
+            if not historical:
+                return pd.DataFrame()
+            if oldest_first:
+                historical = historical[::-1]
+            if columns is None:
+                columns = list(dict.fromkeys(col for row in historical for col in row))
+            else:
+                # Days lacking a field get NaN there below; only a field no day has is an error.
+                missing = [col for col in columns
+                           if col not in historical[0] and not any(col in row for row in historical)]
+                if missing:
+                    raise KeyError(f"{missing} not in response")
+            n = len(historical)
+            columns_data = {}
+            for col in columns:
+                if col in PRICE_TEXT_FIELDS:
+                    columns_data[col] = [row.get(col) for row in historical]
+                    continue
+                col_dtype = dtype.get(col, np.float64) if isinstance(dtype, dict) else dtype
+                try:
+                    values = np.fromiter((row[col] for row in historical), dtype=col_dtype, count=n)
+                except (KeyError, TypeError, ValueError):
+                    # Missing or non-numeric entries: fall back to per-value conversion.
+                    values = [row.get(col) for row in historical]
+                    try:
+                        values = np.array(values, dtype=col_dtype)
+                    except (TypeError, ValueError):
+                        pass
+                columns_data[col] = values
+            return pd.DataFrame(columns_data, columns=columns, copy=False)
         else:
             return pd.DataFrame()
 
@@ -62,13 +286,7 @@ class FMPWrapper:
         https://financialmodelingprep.com/stable/sp500-constituent?apikey=YOUR_API_KEY
         Returns a list of constituent records.
         """
-        url = "https://financialmodelingprep.com/stable/sp500-constituent"
-        params = {"apikey": self.api_key}
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            response.raise_for_status()
+        return self._make_request("sp500-constituent", base_url=self.stable_url)
 
     def get_balance_sheet(self, symbol, period="quarterly"):
         """
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+
+class Float32Mixin:
+    """
+    Shared helper for scalers and transformers that work on float32 numeric features.
+    """
+
+    @staticmethod
+    def _to_float32(data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cast the numeric columns to float32, leaving the other columns untouched.
+        Always returns a new DataFrame, so callers can replace columns without
+        modifying the input.
+
+        :param data: DataFrame with numeric features.
+        :return: DataFrame whose numeric columns are float32.
+        """
+        numeric_cols = data.select_dtypes(include=['number']).columns
+        return data.astype({col: np.float32 for col in numeric_cols}, copy=False)
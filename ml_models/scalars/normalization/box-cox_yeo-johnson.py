@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-from scipy.stats import boxcox
 from sklearn.preprocessing import PowerTransformer
 
 
@@ -17,12 +16,15 @@ class BoxCoxYeoJohnsonScaler:
         :return: Transformed DataFrame.
         """
         transformed_data = data.copy()
-        for column in transformed_data.select_dtypes(include=['number']).columns:
-            if (transformed_data[column] > 0).all():
-                transformed_data[column] = boxcox(transformed_data[column] + 1e-6)[0]
-            else:
-                pt = PowerTransformer(method='yeo-johnson')
-                transformed_data[column] = pt.fit_transform(
-                    transformed_data[[column]]
-                ).flatten()
+        numeric_cols = transformed_data.select_dtypes(include=['number']).columns
+        values = transformed_data[numeric_cols].to_numpy(dtype=np.float64)
+        positive = (values > 0).all(axis=0)
+        # PowerTransformer fits a lambda per column, so one fit per method covers every column.
+        if positive.any():
+            box_cox = PowerTransformer(method='box-cox', standardize=False)
+            values[:, positive] = box_cox.fit_transform(values[:, positive] + 1e-6)
+        if (~positive).any():
+            yeo_johnson = PowerTransformer(method='yeo-johnson')
+            values[:, ~positive] = yeo_johnson.fit_transform(values[:, ~positive])
+        transformed_data[numeric_cols] = values
         return transformed_data
@@ -1,8 +1,9 @@
 import numpy as np
 import pandas as pd
+from ml_models.scalars.float32_mixin import Float32Mixin
 
 
-class LogTransformation:
+class LogTransformation(Float32Mixin):
     """
     Applies log transformation to numeric features.
     """
@@ -14,7 +15,10 @@ class LogTransformation:
         :param data: DataFrame with numeric features.
         :return: Transformed DataFrame.
         """
-        transformed_data = data.copy()
-        for column in transformed_data.select_dtypes(include=['number']).columns:
-            transformed_data[column] = np.log(transformed_data[column] + 1e-6)
+        transformed_data = self._to_float32(data)
+        numeric_cols = transformed_data.select_dtypes(include=['number']).columns
+        values = transformed_data[numeric_cols].to_numpy(copy=True)
+        values += 1e-6
+        np.log(values, out=values)
+        transformed_data[numeric_cols] = values
         return transformed_data
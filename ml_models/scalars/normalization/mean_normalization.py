@@ -1,7 +1,11 @@
+import warnings
+
+import numpy as np
 import pandas as pd
+from ml_models.scalars.float32_mixin import Float32Mixin
 
 
-class MeanNormalization:
+class MeanNormalization(Float32Mixin):
     """
     Applies mean normalization to numeric features.
     """
@@ -13,11 +17,16 @@ class MeanNormalization:
         :param data: DataFrame with numeric features.
         :return: Normalized DataFrame.
         """
-        normalized_data = data.copy()
+        normalized_data = self._to_float32(data)
         numeric_cols = normalized_data.select_dtypes(include=['number']).columns
-        for col in numeric_cols:
-            col_mean = normalized_data[col].mean()
-            col_range = normalized_data[col].max() - normalized_data[col].min()
-            if col_range != 0:
-                normalized_data[col] = (normalized_data[col] - col_mean) / col_range
+        values = normalized_data[numeric_cols].to_numpy(copy=True)
+        with warnings.catch_warnings():
+            # All-NaN columns simply stay NaN, as with the pandas reductions.
+            warnings.simplefilter('ignore', RuntimeWarning)
+            col_mean = np.nanmean(values, axis=0)
+            col_range = np.nanmax(values, axis=0) - np.nanmin(values, axis=0)
+        # Constant columns are left untouched.
+        scale = col_range != 0
+        values[:, scale] = (values[:, scale] - col_mean[scale]) / col_range[scale]
+        normalized_data[numeric_cols] = values
         return normalized_data
@@ -1,14 +1,15 @@
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler as SklearnMinMaxScaler
+from ml_models.scalars.float32_mixin import Float32Mixin
 
 
-class MinMaxScaling:
+class MinMaxScaling(Float32Mixin):
     """
     Applies Min-Max scaling to numeric features.
     """
 
     def __init__(self):
-        self.scaler = SklearnMinMaxScaler()
+        self.scaler = SklearnMinMaxScaler(copy=False)
 
     def transform(self, data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -17,7 +18,10 @@ class MinMaxScaling:
         :param data: DataFrame with numeric features.
         :return: Scaled DataFrame.
         """
-        scaled_data = data.copy()
+        scaled_data = self._to_float32(data)
         numeric_cols = scaled_data.select_dtypes(include=['number']).columns
-        scaled_data[numeric_cols] = self.scaler.fit_transform(scaled_data[numeric_cols])
+        # The extracted block is the only copy made; the scaler works on it in place.
+        values = scaled_data[numeric_cols].to_numpy(copy=True)
+        values = self.scaler.fit(values).transform(values)
+        scaled_data[numeric_cols] = values
         return scaled_data
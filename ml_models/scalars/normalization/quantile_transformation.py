@@ -1,8 +1,9 @@
 import pandas as pd
 from sklearn.preprocessing import QuantileTransformer
+from ml_models.scalars.float32_mixin import Float32Mixin
 
 
-class QuantileTransformation:
+class QuantileTransformation(Float32Mixin):
     """
     Applies quantile transformation to numeric features.
     """
@@ -17,7 +18,7 @@ class QuantileTransformation:
         :param data: DataFrame with numeric features.
         :return: Transformed DataFrame.
         """
-        transformed_data = data.copy()
+        transformed_data = self._to_float32(data)
         numeric_cols = transformed_data.select_dtypes(include=['number']).columns
         transformed_data[numeric_cols] = self.transformer.fit_transform(
             transformed_data[numeric_cols]
@@ -1,8 +1,9 @@
 import numpy as np
 import pandas as pd
+from ml_models.scalars.float32_mixin import Float32Mixin
 
 
-class SigmoidNormalization:
+class SigmoidNormalization(Float32Mixin):
     """
     Applies sigmoid normalization to numeric features.
     """
@@ -14,8 +15,14 @@ class SigmoidNormalization:
         :param data: DataFrame with numeric features.
         :return: Transformed DataFrame.
         """
-        transformed_data = data.copy()
+        transformed_data = self._to_float32(data)
         numeric_cols = transformed_data.select_dtypes(include=['number']).columns
-        for col in numeric_cols:
-            transformed_data[col] = 1 / (1 + np.exp(-transformed_data[col]))
+        values = transformed_data[numeric_cols].to_numpy(copy=True)
+        # exp overflows to inf for large negative inputs in float32, which still maps to 0.
+        with np.errstate(over='ignore'):
+            np.negative(values, out=values)
+            np.exp(values, out=values)
+        values += 1
+        np.reciprocal(values, out=values)
+        transformed_data[numeric_cols] = values
         return transformed_data
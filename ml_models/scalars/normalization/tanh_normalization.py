@@ -1,8 +1,9 @@
 import numpy as np
 import pandas as pd
+from ml_models.scalars.float32_mixin import Float32Mixin
 
 
-class TanhNormalization:
+class TanhNormalization(Float32Mixin):
     """
     Applies tanh normalization to numeric features.
     """
@@ -14,8 +15,9 @@ class TanhNormalization:
         :param data: DataFrame with numeric features.
         :return: Transformed DataFrame.
         """
-        transformed_data = data.copy()
+        transformed_data = self._to_float32(data)
         numeric_cols = transformed_data.select_dtypes(include=['number']).columns
-        for col in numeric_cols:
-            transformed_data[col] = np.tanh(transformed_data[col])
+        values = transformed_data[numeric_cols].to_numpy(copy=True)
+        np.tanh(values, out=values)
+        transformed_data[numeric_cols] = values
         return transformed_data
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -24,6 +25,20 @@ class FiveCategoryDivision:
         self.bins = bins
         self.labels = labels
 
+    def _categorize(self, close_change: np.ndarray) -> np.ndarray:
+        """
+        Map percentage changes to bin codes with the same right-closed intervals as pd.cut.
+        Values outside the bins (or NaN) get the code -1.
+
+        :param close_change: Array of percentage changes.
+        :return: Array of integer bin codes.
+        """
+        edges = np.asarray(self.bins, dtype=np.float64)
+        codes = np.searchsorted(edges, close_change, side="left") - 1
+        invalid = np.isnan(close_change) | (codes < 0) | (codes >= len(edges) - 1)
+        codes[invalid] = -1
+        return codes
+
     def create_target(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Create a target column based on the percentage change in the 'close' price.
@@ -34,18 +49,25 @@ class FiveCategoryDivision:
         """
         df = df.copy()
         if "close" in df.columns:
-            # Calculate percentage change in the close price
-            df["close_change"] = df["close"].pct_change() * 100
-            # Categorize the percentage change into bins
-            df["target"] = pd.cut(df["close_change"], bins=self.bins, labels=self.labels)
-            df.drop(columns=["close_change"], inplace=True)
+            # Calculate percentage change in the close price; like pct_change(), missing closes
+            # are carried forward from the last known one
+            close = df["close"].ffill().to_numpy(dtype=np.float64)
+            close_change = np.full(close.shape, np.nan)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                np.divide(close[1:], close[:-1], out=close_change[1:])
+            close_change[1:] -= 1
+            close_change[1:] *= 100
+            # Categorize the percentage change into bins, shifted one timestamp back
+            codes = np.full(close.shape, -1, dtype=np.int64)
+            codes[:-1] = self._categorize(close_change[1:])
+            df["target"] = pd.Categorical.from_codes(codes, categories=self.labels, ordered=True)
         else:
             print("Column 'close' not found in DataFrame. Creating a default target column with value 0.")
             df["target"] = 0
+            # Shift the target variable one timestamp back
+            df["target"] = df["target"].shift(-1)
 
-        # Shift the target variable one timestamp back
-        df["target"] = df["target"].shift(-1)
         # Drop rows with NaN target values after shifting
-        df.fillna(method="ffill", inplace=True)
+        df.ffill(inplace=True)
 
         return df
@@ -1,4 +1,11 @@
+import numpy as np
 import pandas as pd
+from .validation import validate_columns
+from .kernels import ewm_mean_diff, rolling_mean_var
+from .price_bundle import PriceBundle
+
+# Columns the market data frame must have.
+REQUIRED_COLUMNS = {'market': frozenset({'close', 'high', 'low', 'volume'})}
 
 class Emotional:
     """
@@ -6,49 +13,67 @@ class Emotional:
     
     Attributes:
         df (pd.DataFrame): DataFrame containing market data with OHLCV columns
+        prices (PriceBundle): Returns and rolling statistics shared with the other market factor classes
     """
-    def __init__(self, df):
+    def __init__(self, df, prices=None):
         self.df = df
-        self.required_columns = {'close', 'high', 'low', 'volume'}
-        self._validate_columns()
+        validate_columns(REQUIRED_COLUMNS, {'market': df})
+        self.prices = prices if prices is not None else PriceBundle(df)
+
+    def _volume(self):
+        return self.df['volume'].to_numpy()
+
+    def _volume_ma(self, window=60):
+        volume_ma, _ = self.prices.volume_stats(window)
+        return volume_ma
+
+    def _volume_volatility(self, window=60):
+        _, variance = self.prices.return_stats(window)
+        return np.sqrt(variance)
+
+    def _volume_macd(self, volume):
+        return ewm_mean_diff(volume, 36, 78)
 
-    def _validate_columns(self):
-        missing_cols = self.required_columns - set(self.df.columns)
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
+    def _atr(self, window=42):
+        atr, _ = rolling_mean_var(self.prices.hl_range, window)
+        return atr
 
     def calculate_volume_volatility(self, window=60):
-        self.df['VOL60'] = self.df['close'].pct_change().rolling(window=window).std()
+        self.df['VOL60'] = self._volume_volatility(window)
         return self.df
 
     def calculate_volume_ma(self, window=60):
-        self.df['DAVOL60'] = self.df['volume'].rolling(window=window).mean()
+        self.df['DAVOL60'] = self._volume_ma(window)
         return self.df
 
     def calculate_volume_oscillator(self):
-        volume_ma = self.df['volume'].rolling(window=60).mean()
-        self.df['VOSC'] = self.df['volume'] - volume_ma
+        volume = self._volume()
+        self.df['VOSC'] = volume - self._volume_ma()
         return self.df
 
     def calculate_volume_macd(self):
-        fast_ma = self.df['volume'].ewm(span=36).mean()
-        slow_ma = self.df['volume'].ewm(span=78).mean()
-        self.df['VMACD'] = fast_ma - slow_ma
+        self.df['VMACD'] = self._volume_macd(self._volume())
         return self.df
 
     def calculate_atr(self, window=42):
-        self.df['ATR42'] = (self.df['high'] - self.df['low']).rolling(window=window).mean()
+        self.df['ATR42'] = self._atr(window)
         return self.df
 
     def calculate_all_factors(self):
         try:
-            self.calculate_volume_volatility()
-            self.calculate_volume_ma()
-            self.calculate_volume_oscillator()
-            self.calculate_volume_macd()
-            self.calculate_atr()
-            emotional_columns = ['date','VOL60', 'DAVOL60', 'VOSC', 'VMACD', 'ATR42']
-            return self.df[emotional_columns]
+            # One pass over the arrays: the volume and its 60-day mean are shared by
+            # DAVOL60 and VOSC; the result is built straight from the factor arrays and
+            # self.df is left unchanged.
+            volume = self._volume()
+            volume_ma = self._volume_ma()
+            return pd.DataFrame({
+                'date': self.df['date'],
+                'VOL60': self._volume_volatility(),
+                'DAVOL60': volume_ma,
+                'VOSC': volume - volume_ma,
+                'VMACD': self._volume_macd(volume),
+                'ATR42': self._atr(),
+            }, index=self.df.index)
         except Exception as e:
             print(f"Error calculating emotional factors: {e}")
             return pd.DataFrame()
@@ -1,6 +1,15 @@
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+import asyncio
+import concurrent.futures
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from operator import itemgetter
+import numpy as np
 import pandas as pd
 from data_sources.fmp import FMPWrapper
 from .quality import Quality
@@ -12,6 +21,92 @@ from .style import Style
 from .risk import Risk
 from .momentum import Momentum
 from .technical import Technical
+from .price_bundle import PriceBundle
+from .memo import cached_per_instance
+
+# Annual risk-free rate and its 20- and 60-trading-day equivalents used by the risk factors.
+RISK_FREE_RATE_ANNUAL = 0.065
+RISK_FREE_RATE_20 = (1 + RISK_FREE_RATE_ANNUAL) ** (20 / 252) - 1
+RISK_FREE_RATE_60 = (1 + RISK_FREE_RATE_ANNUAL) ** (60 / 252) - 1
+
+# Non-numeric fields of the FMP statement and ratio responses.
+TEXT_FIELDS = frozenset({'date', 'symbol', 'reportedCurrency', 'cik', 'fillingDate', 'acceptedDate',
+                         'calendarYear', 'period', 'link', 'finalLink'})
+
+# Statement fields used by the factor classes. The FMP schema is fixed, so the record
+# extractor for each field list is built once and reused for every ticker.
+INCOME_FIELDS = ('date', 'symbol','calendarYear', 'period', 'revenue', 'grossProfit', 'netIncome', 'interestExpense', 'eps', 'operatingExpenses', 'costOfRevenue', 'operatingIncome','weightedAverageShsOut')
+BALANCE_FIELDS = ('date', 'symbol', 'calendarYear', 'period', 'netReceivables', 'inventory', 'totalAssets', 'totalLiabilities', 'totalDebt','minorityInterest', 'commonStock', 'totalStockholdersEquity', 'retainedEarnings', "accountPayables", 'totalCurrentAssets', 'totalCurrentLiabilities')
+CASH_FLOW_FIELDS = ('date', 'symbol','calendarYear', 'period', 'dividendsPaid', 'operatingCashFlow', 'freeCashFlow')
+
+
+@lru_cache(maxsize=None)
+def _record_getter(fields):
+    """
+    Return a function extracting the given fields of a record as a tuple in one call.
+    """
+    getter = itemgetter(*fields)
+    if len(fields) == 1:
+        return lambda record: (getter(record),)
+    return getter
+
+# Numeric fields of market_data. Prices are kept as float32; volumes routinely exceed the
+# ~7 significant digits float32 holds, so they stay float64.
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'adjClose', 'volume', 'changePercent')
+PRICE_DTYPES = {**dict.fromkeys(PRICE_FIELDS, np.float32), 'volume': np.float64}
+
+# Factor groups in the order calculate_all_factors reports them:
+# (category, factor class, {constructor argument: FactorsWrapper attribute}, constant arguments).
+# The market-data classes add their columns to the frame they are given, so they get
+# market_data_copy and can run side by side; they share one price_bundle.
+FACTOR_SPECS = (
+    ('quality', Quality, {'income_data': 'income_data', 'balance_data': 'balance_data',
+                          'cash_flow_data': 'cash_flow_data'}, {}),
+    ('value', Value, {'income_data': 'income_data', 'balance_data': 'balance_data',
+                      'cash_flow_data': 'cash_flow_data', 'market_data': 'market_data',
+                      'financial_ratio_data': 'financial_ratio_data'}, {}),
+    ('stock', Stock, {'income_data': 'income_data', 'balance_data': 'balance_data',
+                      'cash_flow_data': 'cash_flow_data', 'market_data': 'market_data'}, {}),
+    ('growth', Growth, {'income_data': 'income_data', 'balance_data': 'balance_data',
+                        'cash_flow_data': 'cash_flow_data', 'market_data': 'market_data'}, {}),
+    ('emotional', Emotional, {'df': 'market_data_copy', 'prices': 'price_bundle'}, {}),
+    ('style', Style, {'df': 'market_data', 'sp500_returns': 'sp500_returns', 'tickers': 'tickers'}, {}),
+    ('risk', Risk, {'df': 'market_data_copy', 'prices': 'price_bundle'},
+     {'risk_free_rate_20': RISK_FREE_RATE_20, 'risk_free_rate_60': RISK_FREE_RATE_60}),
+    ('momentum', Momentum, {'df': 'market_data_copy', 'prices': 'price_bundle'}, {}),
+    ('technical', Technical, {'df': 'market_data_copy', 'prices': 'price_bundle'}, {}),
+)
+_FACTOR_SPECS_BY_CATEGORY = {spec[0]: spec for spec in FACTOR_SPECS}
+
+# Part of every factor cache key. Bump it whenever a factor formula changes, so results
+# cached by the old formulas are not served for the same inputs.
+FACTOR_CACHE_VERSION = 1
+
+# Number of calculate_all_factors results kept in memory, least recently used dropped first.
+RESULTS_CACHE_SIZE = 64
+
+def _copy_results(results):
+    """
+    Copy the DataFrames of a calculate_all_factors result, so the cache and its callers never share them.
+    """
+    return {category: value.copy() if isinstance(value, pd.DataFrame) else value
+            for category, value in results.items()}
+
+def _run_batch(executor, compute, jobs):
+    """
+    Run compute(*args) on executor for every ticker in jobs (ticker -> args) and return the
+    results by ticker. The batch entry points all go through here, so they share one way of
+    running tickers and one error handling: failed tickers are reported and left out.
+    """
+    results = {}
+    with executor:
+        futures = {ticker: executor.submit(compute, *args) for ticker, args in jobs.items()}
+        for ticker, future in futures.items():
+            try:
+                results[ticker] = future.result()
+            except Exception as e:
+                print(f"Error processing {ticker}: {e}")
+    return results
 
 class FactorsWrapper:
     """
@@ -19,34 +114,107 @@ class FactorsWrapper:
 
     It fetches financial statements and market data via the FMPWrapper, converts the responses to DataFrames,
     and passes them to the individual factor calculation classes.
+
+    Results of calculate_all_factors are cached in memory, and in cache_dir if given, keyed by a hash of
+    the ticker, dates, input data and FACTOR_CACHE_VERSION, so unchanged inputs are never recomputed.
+    Entries in cache_dir are loaded with pickle, so only point it at a directory you trust.
     """
-    def __init__(self, ticker, fmp: FMPWrapper, start_date, end_date, period="quarterly"):
+    # Factor groups in the order calculate_all_factors reports them.
+    FACTOR_CATEGORIES = tuple(spec[0] for spec in FACTOR_SPECS)
+
+    # The RESULTS_CACHE_SIZE most recently used factor results by input hash, shared by all
+    # instances in the process; the lock guards it across the worker threads.
+    _results_cache = OrderedDict()
+    _results_lock = threading.Lock()
+
+    def __init__(self, ticker, fmp: FMPWrapper, start_date, end_date, period="quarterly", cache_dir=None):
         self.ticker = ticker
         self.fmp = fmp
         self.period = period
         self.start_date = start_date
         self.end_date = end_date
-
-        # Fetch current financial statements and convert to DataFrames.
-        self.income_data = self._get_df(self.fmp.get_income_statement(self.ticker, period=self.period))
-        self.balance_data = self._get_df(self.fmp.get_balance_sheet(self.ticker, period=self.period))
-        self.cash_flow_data = self._get_df(self.fmp.get_cash_flow_statement(self.ticker, period=self.period))
-        self.financial_ratio_data = self._get_df(self.fmp.get_financial_ratios(self.ticker, period=self.period))
+        self.cache_dir = cache_dir
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
 
         self.prev_quarter_start_date = self.get_prev_quarter_start(start_date)
 
-        self.balance_data = self.balance_data[(self.balance_data['date'] >= self.prev_quarter_start_date) & (self.balance_data['date'] <= self.end_date)][['date', 'symbol', 'calendarYear', 'period', 'netReceivables', 'inventory', 'totalAssets', 'totalLiabilities', 'totalDebt','minorityInterest', 'commonStock', 'totalStockholdersEquity', 'retainedEarnings', "accountPayables", 'totalCurrentAssets', 'totalCurrentLiabilities']].iloc[::-1].reset_index(drop=True)
-        self.income_data = self.income_data[(self.income_data['date'] >= self.prev_quarter_start_date) & (self.income_data['date'] <= self.end_date)][['date', 'symbol','calendarYear', 'period', 'revenue', 'grossProfit', 'netIncome', 'interestExpense', 'eps', 'operatingExpenses', 'costOfRevenue', 'operatingIncome','weightedAverageShsOut']].iloc[::-1].reset_index(drop=True)
-        self.cash_flow_data = self.cash_flow_data[(self.cash_flow_data['date'] >= self.prev_quarter_start_date) & (self.cash_flow_data['date'] <= self.end_date)][['date', 'symbol','calendarYear', 'period', 'dividendsPaid', 'operatingCashFlow', 'freeCashFlow']].iloc[::-1].reset_index(drop=True)
-        self.financial_ratio_data = self.financial_ratio_data[(self.financial_ratio_data['date'] >= self.prev_quarter_start_date) & (self.financial_ratio_data['date'] <= self.end_date)].iloc[::-1].reset_index(drop=True)
+        # The endpoints are independent and I/O bound, so fetch them concurrently.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            income_future = executor.submit(self.fmp.get_income_statement, self.ticker, period=self.period)
+            balance_future = executor.submit(self.fmp.get_balance_sheet, self.ticker, period=self.period)
+            cash_flow_future = executor.submit(self.fmp.get_cash_flow_statement, self.ticker, period=self.period)
+            ratio_future = executor.submit(self.fmp.get_financial_ratios, self.ticker, period=self.period)
+            market_future = executor.submit(self.fmp.get_historical_price, self.ticker, self.prev_quarter_start_date, end_date,
+                                            columns=['date', *PRICE_FIELDS], dtype=PRICE_DTYPES, oldest_first=True)
+
+        # Convert the financial statements to DataFrames covering [prev quarter start, end date], oldest first.
+        self.income_data = self._get_df(income_future.result(), INCOME_FIELDS)
+        self.balance_data = self._get_df(balance_future.result(), BALANCE_FIELDS)
+        self.cash_flow_data = self._get_df(cash_flow_future.result(), CASH_FLOW_FIELDS)
+        self.financial_ratio_data = self._get_df(ratio_future.result())
 
         # print(self.balance_data)
 
-        # Fetch historical market data for market-related factors.
-        self.market_data = self.fmp.get_historical_price(self.ticker, self.prev_quarter_start_date, end_date)
-        self.market_data = self.market_data[['date','open', 'high', 'low', 'close', 'adjClose', 'volume', 'changePercent']].iloc[::-1].reset_index(drop=True)
+        # Historical market data for market-related factors, parsed oldest first straight into typed columns.
+        self.market_data = market_future.result()
+        if self.market_data.empty:
+            raise KeyError(f"No historical price data for {self.ticker}")
         # print(self.market_data)
 
+    @classmethod
+    def batch(cls, tickers, fmp: FMPWrapper, start_date, end_date, period="quarterly", max_workers=8, cache_dir=None):
+        """
+        Calculate all factors for several tickers with one shared FMPWrapper.
+
+        Tickers are processed concurrently in threads, which overlaps their network requests;
+        the factor kernels release the GIL, so the threads also share the CPU work. Returns a
+        dict mapping each ticker to its calculate_all_factors() result; tickers whose data could
+        not be fetched are reported and left out.
+        """
+        def run(ticker):
+            return cls(ticker, fmp, start_date, end_date, period=period, cache_dir=cache_dir).calculate_all_factors()
+
+        return _run_batch(concurrent.futures.ThreadPoolExecutor(max_workers=max_workers), run,
+                          {ticker: (ticker,) for ticker in tickers})
+
+    @classmethod
+    async def abatch(cls, tickers, fmp: FMPWrapper, start_date, end_date, period="quarterly",
+                     max_concurrency=16, cache_dir=None):
+        """
+        Asynchronous version of batch() for callers running an event loop.
+
+        Runs batch() off the loop with at most max_concurrency tickers in flight, to respect the
+        API rate limit. Returns the same dict as batch().
+        """
+        return await asyncio.to_thread(cls.batch, tickers, fmp, start_date, end_date, period=period,
+                                       max_workers=max_concurrency, cache_dir=cache_dir)
+
+    @classmethod
+    def from_frames(cls, ticker, income_data, balance_data, cash_flow_data, financial_ratio_data,
+                    market_data, sp500_data, start_date, end_date, period="quarterly", cache_dir=None):
+        """
+        Build a wrapper from already loaded DataFrames, shaped like the ones __init__ fetches,
+        without making any requests. sp500_data holds the ^GSPC prices used by the style factors.
+        """
+        self = cls.__new__(cls)
+        self.ticker = ticker
+        self.fmp = None
+        self.period = period
+        self.start_date = start_date
+        self.end_date = end_date
+        self.cache_dir = cache_dir
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self.prev_quarter_start_date = self.get_prev_quarter_start(start_date)
+        self.income_data = income_data
+        self.balance_data = balance_data
+        self.cash_flow_data = cash_flow_data
+        self.financial_ratio_data = financial_ratio_data
+        self.market_data = market_data
+        self.sp500_data = sp500_data
+        return self
+
     def get_prev_quarter_start(self, date_str):
         date = pd.to_datetime(date_str)
         # Get current quarter
@@ -65,119 +233,215 @@ class FactorsWrapper:
         )
         return prev_quarter_start.strftime('%Y-%m-%d')
 
-    def _get_df(self, data):
+    def _get_df(self, data, columns=None):
         """
-        Convert the JSON response (a list of dicts) from FMPWrapper to a pandas DataFrame.
-        If the list contains more than one period, use the element at the provided index.
+        Convert the JSON response (a list of dicts, newest first) from FMPWrapper to a pandas DataFrame.
+        Only periods dated between the previous quarter start and the end date are kept, oldest first,
+        so the frame is built once at its final size. If columns is given, only those are built.
         """
         if isinstance(data, list) and len(data) > 0:
-            return pd.DataFrame(data)
+            if columns is None:
+                # Every field of any period, as pd.DataFrame(data) would give.
+                columns = tuple(dict.fromkeys(col for row in data for col in row))
+            records = [row for row in reversed(data) if self.prev_quarter_start_date <= row['date'] <= self.end_date]
+            # A period may lack some fields (they become missing below); only a field that no
+            # kept period has is an error.
+            missing = [col for col in columns if not any(col in row for row in records)]
+            if records and missing:
+                raise KeyError(f"{missing} not in response")
+            # Numeric fields go straight into float64 arrays (None becomes NaN) instead of
+            # letting pandas infer a dtype value by value; text fields are left as objects.
+            # Statement figures such as revenue or total assets routinely exceed 1e10, beyond
+            # float32's ~7 significant digits, so they keep double precision.
+            getter = _record_getter(tuple(columns))
+            try:
+                rows = [getter(row) for row in records]
+            except KeyError:
+                # Some period lacks a field; those values become missing.
+                rows = [tuple(row.get(col) for col in columns) for row in records]
+            columns_data = {}
+            for col, values in zip(columns, zip(*rows) if rows else [()] * len(columns)):
+                values = list(values)
+                if col not in TEXT_FIELDS:
+                    try:
+                        values = np.array(values, dtype=np.float64)
+                    except (TypeError, ValueError):
+                        pass
+                columns_data[col] = values
+            return pd.DataFrame(columns_data, columns=list(columns))
         else:
             return pd.DataFrame()
 
-    def calculate_all_factors(self):
-        results = {}
+    def _inputs_hash(self, sp_500):
+        """
+        Hash the cache version, ticker, dates and every input frame (values, index and column names).
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((FACTOR_CACHE_VERSION, self.ticker, self.period, self.start_date,
+                            self.end_date)).encode("utf-8"))
+        for df in (self.income_data, self.balance_data, self.cash_flow_data,
+                   self.financial_ratio_data, self.market_data, sp_500):
+            digest.update(repr(list(df.columns)).encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(df).to_numpy().tobytes())
+        return digest.hexdigest()
 
-        # Quality factors
-        try:
-            quality_obj = Quality(
-                income_data=self.income_data,
-                balance_data=self.balance_data,
-                cash_flow_data=self.cash_flow_data,
-            )
-            results['quality'] = quality_obj.calculate_all_factors()
-        except Exception as e:
-            results['quality'] = f"Error: {e}"
+    def _remember_results(self, key, results):
+        """
+        Keep results in the in-memory cache, dropping the least recently used beyond RESULTS_CACHE_SIZE.
+        """
+        with self._results_lock:
+            self._results_cache[key] = results
+            self._results_cache.move_to_end(key)
+            while len(self._results_cache) > RESULTS_CACHE_SIZE:
+                self._results_cache.popitem(last=False)
 
-        # Value factors
-        try:
-            value_obj = Value(
-                income_data=self.income_data,
-                balance_data=self.balance_data,
-                cash_flow_data=self.cash_flow_data,
-                market_data = self.market_data,
-                financial_ratio_data=self.financial_ratio_data
-            )
-            results['value'] = value_obj.calculate_all_factors()
-        except Exception as e:
-            results['value'] = f"Error: {e}"
+    def _load_cached_results(self, key):
+        """
+        Return a copy of the cached results for key from memory or cache_dir, or None on a miss.
+        """
+        with self._results_lock:
+            results = self._results_cache.get(key)
+            if results is not None:
+                self._results_cache.move_to_end(key)
+                return _copy_results(results)
+        if self.cache_dir is not None:
+            try:
+                with open(os.path.join(self.cache_dir, f"{key}.pkl"), "rb") as f:
+                    results = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return None
+            self._remember_results(key, results)
+            return _copy_results(results)
+        return None
 
-        # # Stock factors
-        try:
-            stock_obj = Stock(
-                income_data=self.income_data,
-                balance_data=self.balance_data,
-                cash_flow_data=self.cash_flow_data,
-                market_data = self.market_data
-            )
-            results['stock'] = stock_obj.calculate_all_factors()
-        except Exception as e:
-            results['stock'] = f"Error: {e}"
+    def _store_cached_results(self, key, results):
+        """
+        Keep a copy of results in memory and, if cache_dir is set, write them there atomically.
+        """
+        self._remember_results(key, _copy_results(results))
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, f"{key}.pkl")
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(results, f)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass
 
-        # # Growth factors
-        try:
-            growth_obj = Growth(
-                income_data=self.income_data,
-                balance_data=self.balance_data,
-                cash_flow_data=self.cash_flow_data,
-                market_data=self.market_data
-            )
-            results['growth'] = growth_obj.calculate_all_factors()
-        except Exception as e:
-            results['growth'] = f"Error: {e}"
+    @property
+    def market_data_copy(self):
+        """A private copy of market_data for factor classes that add columns to it."""
+        return self.market_data.copy()
 
-        # Emotional factors using market data
-        try:
-            emotional_obj = Emotional(self.market_data)
-            results['emotional'] = emotional_obj.calculate_all_factors()
-        except Exception as e:
-            results['emotional'] = f"Error: {e}"
+    @cached_per_instance
+    def price_bundle(self):
+        """Returns and rolling price statistics shared by the market factor classes."""
+        return PriceBundle(self.market_data)
 
-        # Style factors (stub - adjust if style factor calculations are implemented)
-        combined_data = self.market_data.copy()
-        tickers = [self.ticker]
-        sp_500 = self.fmp.get_historical_price('^GSPC', self.prev_quarter_start_date, self.end_date)
-        try:
-            style_obj = Style(combined_data, sp_500[['date','changePercent']], tickers)
-            results['style'] = style_obj.calculate_all_factors()
-        except Exception as e:
-            results['style'] = f"Error: {e}"
+    @property
+    def sp500_returns(self):
+        """Daily S&P 500 changes used by the style factors."""
+        return self.sp500_data[['date','changePercent']]
 
-        # Risk factors
-        try:
-            risk_free_rate_annual = 0.065
-            risk_obj = Risk(
-                df=self.market_data,
-                risk_free_rate_20=(1 + risk_free_rate_annual) ** (20 / 252) - 1,
-                risk_free_rate_60=(1 + risk_free_rate_annual) ** (60 / 252) - 1
-            )
-            results['risk'] = risk_obj.calculate_all_factors()
-        except Exception as e:
-            results['risk'] = f"Error: {e}"
+    @property
+    def tickers(self):
+        return [self.ticker]
 
-        # Momentum factors
+    def _compute(self, category):
+        """
+        Calculate one factor group, reporting a failure as an error string.
+        """
+        _, factor_class, attributes, constants = _FACTOR_SPECS_BY_CATEGORY[category]
         try:
-            momentum_obj = Momentum(self.market_data)
-            results['momentum'] = momentum_obj.calculate_all_factors()
+            kwargs = {name: getattr(self, attribute) for name, attribute in attributes.items()}
+            return factor_class(**kwargs, **constants).calculate_all_factors()
         except Exception as e:
-            results['momentum'] = f"Error: {e}"
+            return f"Error: {e}"
 
-        # Technical factors
-        try:
-            technical_obj = Technical(self.market_data)
-            results['technical'] = technical_obj.calculate_all_factors()
-        except Exception as e:
-            results['technical'] = f"Error: {e}"
+    # Each factor group is calculated on first access only, so callers that need a
+    # subset of the groups never pay for the others.
+    @cached_per_instance
+    def sp500_data(self):
+        """Benchmark (^GSPC) prices used by the style factors."""
+        return self.fmp.get_historical_price('^GSPC', self.prev_quarter_start_date, self.end_date)
+
+    @cached_per_instance
+    def quality(self):
+        return self._compute('quality')
+
+    @cached_per_instance
+    def value(self):
+        return self._compute('value')
+
+    @cached_per_instance
+    def stock(self):
+        return self._compute('stock')
+
+    @cached_per_instance
+    def growth(self):
+        return self._compute('growth')
+
+    @cached_per_instance
+    def emotional(self):
+        return self._compute('emotional')
+
+    @cached_per_instance
+    def style(self):
+        return self._compute('style')
+
+    @cached_per_instance
+    def risk(self):
+        return self._compute('risk')
 
-        return results
+    @cached_per_instance
+    def momentum(self):
+        return self._compute('momentum')
+
+    @cached_per_instance
+    def technical(self):
+        return self._compute('technical')
+
+    def calculate_all_factors(self):
+        # Skip the computation entirely when the same inputs have been seen before.
+        key = self._inputs_hash(self.sp500_data)
+        cached = self._load_cached_results(key)
+        if cached is not None:
+            # Seed the cached properties so later attribute access is free as well.
+            self.__dict__.update(cached)
+            return dict(cached)
+
+        # The factor groups only read the shared inputs, so they are computed concurrently.
+        # Results keep the usual category order.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.FACTOR_CATEGORIES)) as executor:
+            futures = {category: executor.submit(getattr, self, category) for category in self.FACTOR_CATEGORIES}
+            results = {category: future.result() for category, future in futures.items()}
+
+        self._store_cached_results(key, results)
+        return dict(results)
+
+def _factors_from_frames(ticker, frames, sp500_data, start_date, end_date):
+    return FactorsWrapper.from_frames(ticker, **frames, sp500_data=sp500_data,
+                                      start_date=start_date, end_date=end_date).calculate_all_factors()
+
+def compute_all_for_tickers(panel, sp500_data, start_date, end_date, max_workers=None):
+    """
+    Calculate all factors for tickers whose data is already loaded, spread over worker processes.
+
+    The factor calculations are CPU bound and independent per ticker, so unlike batch() this uses
+    processes rather than threads. panel maps each ticker to a dict with the income_data,
+    balance_data, cash_flow_data, financial_ratio_data and market_data frames.
+    Returns the same dict as FactorsWrapper.batch().
+    """
+    return _run_batch(concurrent.futures.ProcessPoolExecutor(max_workers=max_workers), _factors_from_frames,
+                      {ticker: (ticker, frames, sp500_data, start_date, end_date) for ticker, frames in panel.items()})
 
 if __name__ == "__main__":
     # For testing this module individually.
     api_key = "bEiVRux9rewQy16TXMPxDqBAQGIW8UBd"
     fmp = FMPWrapper(api_key)
-    ticker = "AAPL"
+    tickers = ["AAPL"]
     start_date = "2020-01-01"
     end_date = "2020-12-31"
-    wrapper = FactorsWrapper(ticker, fmp, start_date, end_date)
-    all_factors = wrapper.calculate_all_factors()
+    all_factors = asyncio.run(FactorsWrapper.abatch(tickers, fmp, start_date, end_date))
     print(all_factors)
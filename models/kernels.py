@@ -0,0 +1,427 @@
+import numpy as np
+
+# Numba is optional: without it the kernels run as plain Python loops.
+# The kernels accept float32 or float64 arrays and always accumulate in float64.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def jit(func):
+    """
+    Compile func with numba in nopython mode when numba is installed, otherwise return it unchanged.
+    """
+    if njit is None:
+        return func
+    return njit(cache=True, nogil=True)(func)
+
+
+@jit
+def _ewm_update(cur, weighted, old_wt, old_wt_factor):
+    """
+    One step of the adjusted exponentially weighted mean: fold cur into the running mean
+    weighted with total weight old_wt. Returns the new (weighted, old_wt).
+    """
+    is_observation = cur == cur
+    if weighted == weighted:
+        old_wt *= old_wt_factor
+        if is_observation:
+            if weighted != cur:
+                weighted = (old_wt * weighted + cur) / (old_wt + 1.0)
+            old_wt += 1.0
+    elif is_observation:
+        weighted = cur
+    return weighted, old_wt
+
+
+@jit
+def ewm_mean(values, span):
+    """
+    Exponentially weighted mean, matching pandas Series.ewm(span=span).mean() (adjust=True).
+    Missing values keep the previous mean and still decay the weights.
+    """
+    n = values.shape[0]
+    out = np.empty(n)
+    if n == 0:
+        return out
+    old_wt_factor = 1.0 - 2.0 / (span + 1.0)
+    weighted = float(values[0])
+    nobs = 1 if weighted == weighted else 0
+    out[0] = weighted if nobs >= 1 else np.nan
+    old_wt = 1.0
+    for i in range(1, n):
+        cur = float(values[i])
+        if cur == cur:
+            nobs += 1
+        weighted, old_wt = _ewm_update(cur, weighted, old_wt, old_wt_factor)
+        out[i] = weighted if nobs >= 1 else np.nan
+    return out
+
+
+@jit
+def ewm_mean_diff(values, fast_span, slow_span):
+    """
+    ewm_mean(values, fast_span) - ewm_mean(values, slow_span), with both means kept in one pass.
+    """
+    n = values.shape[0]
+    out = np.empty(n)
+    if n == 0:
+        return out
+    fast_wt_factor = 1.0 - 2.0 / (fast_span + 1.0)
+    slow_wt_factor = 1.0 - 2.0 / (slow_span + 1.0)
+    fast = slow = float(values[0])
+    fast_wt = slow_wt = 1.0
+    out[0] = fast - slow
+    for i in range(1, n):
+        cur = float(values[i])
+        fast, fast_wt = _ewm_update(cur, fast, fast_wt, fast_wt_factor)
+        slow, slow_wt = _ewm_update(cur, slow, slow_wt, slow_wt_factor)
+        out[i] = fast - slow
+    return out
+
+
+@jit
+def trix(values, span):
+    """
+    One-period change of the triple exponentially weighted mean, in one pass. Matches
+    ewm_mean applied three times followed by pandas pct_change().
+    """
+    n = values.shape[0]
+    out = np.empty(n)
+    if n == 0:
+        return out
+    old_wt_factor = 1.0 - 2.0 / (span + 1.0)
+    e1 = e2 = e3 = float(values[0])
+    wt1 = wt2 = wt3 = 1.0
+    out[0] = np.nan
+    prev = e3
+    for i in range(1, n):
+        e1, wt1 = _ewm_update(float(values[i]), e1, wt1, old_wt_factor)
+        e2, wt2 = _ewm_update(e1, e2, wt2, old_wt_factor)
+        e3, wt3 = _ewm_update(e2, e3, wt3, old_wt_factor)
+        out[i] = e3 / prev - 1.0
+        if e3 == e3:
+            prev = e3
+    return out
+
+
+@jit
+def rolling_sum(values, window):
+    """
+    Rolling sum over a fixed window, matching pandas Series.rolling(window).sum():
+    NaN unless the whole window is observed, Kahan-compensated running sum.
+    """
+    n = values.shape[0]
+    out = np.empty(n)
+    nobs = 0
+    sum_x = 0.0
+    compensation_add = 0.0
+    compensation_remove = 0.0
+    prev_value = float(values[0]) if n > 0 else 0.0
+    num_consecutive_same_value = 0
+    for i in range(n):
+        if i >= window:
+            val = float(values[i - window])
+            if val == val:
+                nobs -= 1
+                y = -val - compensation_remove
+                t = sum_x + y
+                compensation_remove = t - sum_x - y
+                sum_x = t
+        val = float(values[i])
+        if val == val:
+            nobs += 1
+            y = val - compensation_add
+            t = sum_x + y
+            compensation_add = t - sum_x - y
+            sum_x = t
+            if val == prev_value:
+                num_consecutive_same_value += 1
+            else:
+                num_consecutive_same_value = 1
+            prev_value = val
+        if nobs >= window:
+            if num_consecutive_same_value >= nobs:
+                out[i] = prev_value * nobs
+            else:
+                out[i] = sum_x
+        else:
+            out[i] = np.nan
+    return out
+
+
+@jit
+def money_flow_sums(high, low, close, volume, window):
+    """
+    Rolling sums over window of the positive and negative money flow used by the money flow
+    index, in one compiled call. The raw money flow is the typical price (high + low + close) / 3
+    times the volume; it counts as positive when the typical price rose from the previous
+    period and as negative when it fell. The sums match rolling_sum.
+    """
+    n = close.shape[0]
+    positive = np.empty(n)
+    negative = np.empty(n)
+    prev_typical_price = np.nan
+    for i in range(n):
+        typical_price = (float(close[i]) + float(high[i]) + float(low[i])) / 3
+        money_flow = typical_price * float(volume[i])
+        positive[i] = money_flow if typical_price > prev_typical_price else 0.0
+        negative[i] = money_flow if typical_price < prev_typical_price else 0.0
+        prev_typical_price = typical_price
+    return rolling_sum(positive, window), rolling_sum(negative, window)
+
+
+@jit
+def rolling_mean_var(values, window):
+    """
+    Rolling mean and sample variance (ddof=1) over a fixed window in one pass, matching
+    pandas Series.rolling(window).mean() and .var(): NaN unless the whole window is observed.
+    """
+    n = values.shape[0]
+    mean_out = np.empty(n)
+    var_out = np.empty(n)
+    # Kahan-compensated running sum for the mean.
+    sum_x = 0.0
+    sum_add = 0.0
+    sum_remove = 0.0
+    neg_ct = 0
+    # Welford running mean/sum of squared deviations for the variance.
+    mean_x = 0.0
+    ssqdm_x = 0.0
+    var_add = 0.0
+    var_remove = 0.0
+    nobs = 0
+    prev_value = float(values[0]) if n > 0 else 0.0
+    num_consecutive_same_value = 0
+    for i in range(n):
+        if i >= window:
+            val = float(values[i - window])
+            if val == val:
+                nobs -= 1
+                y = -val - sum_remove
+                t = sum_x + y
+                sum_remove = t - sum_x - y
+                sum_x = t
+                if np.signbit(val):
+                    neg_ct -= 1
+                if nobs:
+                    prev_mean = mean_x - var_remove
+                    y = val - var_remove
+                    t = y - mean_x
+                    var_remove = t + mean_x - y
+                    mean_x -= t / nobs
+                    ssqdm_x -= (val - prev_mean) * (val - mean_x)
+                else:
+                    mean_x = 0.0
+                    ssqdm_x = 0.0
+        val = float(values[i])
+        if val == val:
+            if val == prev_value:
+                num_consecutive_same_value += 1
+            else:
+                num_consecutive_same_value = 1
+            prev_value = val
+            nobs += 1
+            y = val - sum_add
+            t = sum_x + y
+            sum_add = t - sum_x - y
+            sum_x = t
+            if np.signbit(val):
+                neg_ct += 1
+            prev_mean = mean_x - var_add
+            y = val - var_add
+            t = y - mean_x
+            var_add = t + mean_x - y
+            mean_x += t / nobs
+            ssqdm_x += (val - prev_mean) * (val - mean_x)
+        if nobs >= window and nobs > 0:
+            mean = sum_x / nobs
+            if num_consecutive_same_value >= nobs:
+                mean = prev_value
+            elif neg_ct == 0 and mean < 0:
+                mean = 0.0
+            elif neg_ct == nobs and mean > 0:
+                mean = 0.0
+            mean_out[i] = mean
+        else:
+            mean_out[i] = np.nan
+        if nobs >= window and nobs > 1:
+            if num_consecutive_same_value >= nobs:
+                var_out[i] = 0.0
+            else:
+                var = ssqdm_x / (nobs - 1)
+                var_out[i] = var if var > 0 else 0.0
+        else:
+            var_out[i] = np.nan
+    return mean_out, var_out
+
+
+@jit
+def rolling_beta(values, market, window):
+    """
+    Rolling beta of values against market over a fixed window, their sample covariance over
+    the sample variance of market, in one compiled call. Matches pandas
+    values.rolling(window).cov(market) / var.where(var != 0) with var = market.rolling(window).var():
+    NaN unless the whole window is observed, or when the market variance is 0.
+    """
+    n = values.shape[0]
+    x = np.empty(n)
+    y = np.empty(n)
+    y_all = np.empty(n)
+    xy = np.empty(n)
+    for i in range(n):
+        # Like pandas, infinite values count as missing, and the covariance only uses the
+        # periods where both series are observed; the variance uses every market period.
+        y_all[i] = float(market[i]) if np.isfinite(market[i]) else np.nan
+        observed = np.isfinite(values[i]) and np.isfinite(market[i])
+        x[i] = float(values[i]) if observed else np.nan
+        y[i] = y_all[i] if observed else np.nan
+        xy[i] = x[i] * y[i]
+    mean_xy, _ = rolling_mean_var(xy, window)
+    mean_x, _ = rolling_mean_var(x, window)
+    mean_y, _ = rolling_mean_var(y, window)
+    _, var_y = rolling_mean_var(y_all, window)
+    out = np.empty(n)
+    count = 0
+    for i in range(n):
+        if xy[i] == xy[i]:
+            count += 1
+        if i >= window and xy[i - window] == xy[i - window]:
+            count -= 1
+        if count > 1 and var_y[i] != 0:
+            out[i] = (mean_xy[i] - mean_x[i] * mean_y[i]) * (count / (count - 1.0)) / var_y[i]
+        else:
+            out[i] = np.nan
+    return out
+
+
+@jit
+def _kahan_add(total, compensation, value):
+    y = value - compensation
+    t = total + y
+    return t, t - total - y
+
+
+@jit
+def rolling_skew_kurt(values, window):
+    """
+    Rolling skewness and excess kurtosis over a fixed window in one pass, matching pandas
+    Series.rolling(window).skew() and .kurt(): running power sums updated as values enter
+    and leave the window, NaN unless the whole window is observed.
+    """
+    n = values.shape[0]
+    skew_out = np.empty(n)
+    kurt_out = np.empty(n)
+    # Like pandas, shift the values by their rounded mean when that keeps small values
+    # precise, to limit cancellation in the power sums.
+    nobs_mean = 0
+    sum_val = 0.0
+    min_val = np.inf
+    for i in range(n):
+        val = float(values[i])
+        if val == val:
+            nobs_mean += 1
+            sum_val += val
+            if val < min_val:
+                min_val = val
+    shift = 0.0
+    if nobs_mean > 0:
+        mean_val = sum_val / nobs_mean
+        if min_val - mean_val > -1e5:
+            shift = np.round(mean_val)
+    x = xx = xxx = xxxx = 0.0
+    c_x_add = c_xx_add = c_xxx_add = c_xxxx_add = 0.0
+    c_x_remove = c_xx_remove = c_xxx_remove = c_xxxx_remove = 0.0
+    nobs = 0
+    prev_value = float(values[0]) if n > 0 else 0.0
+    num_consecutive_same_value = 0
+    for i in range(n):
+        if i >= window:
+            val = float(values[i - window]) - shift
+            if val == val:
+                nobs -= 1
+                x, c_x_remove = _kahan_add(x, c_x_remove, -val)
+                xx, c_xx_remove = _kahan_add(xx, c_xx_remove, -(val * val))
+                xxx, c_xxx_remove = _kahan_add(xxx, c_xxx_remove, -(val * val * val))
+                xxxx, c_xxxx_remove = _kahan_add(xxxx, c_xxxx_remove, -(val * val * val * val))
+        val = float(values[i]) - shift
+        if val == val:
+            nobs += 1
+            x, c_x_add = _kahan_add(x, c_x_add, val)
+            xx, c_xx_add = _kahan_add(xx, c_xx_add, val * val)
+            xxx, c_xxx_add = _kahan_add(xxx, c_xxx_add, val * val * val)
+            xxxx, c_xxxx_add = _kahan_add(xxxx, c_xxxx_add, val * val * val * val)
+            if val == prev_value:
+                num_consecutive_same_value += 1
+            else:
+                num_consecutive_same_value = 1
+            prev_value = val
+        skew = np.nan
+        kurt = np.nan
+        if nobs >= window:
+            dnobs = float(nobs)
+            A = x / dnobs
+            R = A * A
+            B = xx / dnobs - R
+            R = R * A
+            C = xxx / dnobs - R - 3 * A * B
+            R = R * A
+            D = xxxx / dnobs - R - 6 * B * A * A - 4 * C * A
+            if nobs >= 3:
+                if num_consecutive_same_value >= nobs:
+                    skew = 0.0
+                elif B > 1e-14:
+                    root = np.sqrt(B)
+                    skew = (np.sqrt(dnobs * (dnobs - 1.0)) * C) / ((dnobs - 2) * root * root * root)
+            if nobs >= 4:
+                if num_consecutive_same_value >= nobs:
+                    kurt = -3.0
+                elif B > 1e-14:
+                    K = (dnobs * dnobs - 1.0) * D / (B * B) - 3 * ((dnobs - 1.0) ** 2)
+                    kurt = K / ((dnobs - 2.0) * (dnobs - 3.0))
+        skew_out[i] = skew
+        kurt_out[i] = kurt
+    return skew_out, kurt_out
+
+
+def by_column(kernel, arrays, *args, outputs=1):
+    """
+    Apply a one-dimensional kernel to 2-D arrays (one row per date, one column per ticker)
+    column by column, stacking its result, or each of its outputs results, into 2-D arrays.
+
+    :param kernel: One of the kernels above
+    :param arrays: The kernel's array arguments as 2-D arrays of the same shape
+    :param args: The kernel's remaining arguments, e.g. the window
+    :param outputs: Number of arrays the kernel returns
+    :return: A 2-D float64 array, or a list of them if outputs > 1
+    """
+    n_rows, n_cols = arrays[0].shape
+    results = [np.empty((n_rows, n_cols)) for _ in range(outputs)]
+    for j in range(n_cols):
+        result = kernel(*[np.ascontiguousarray(values[:, j]) for values in arrays], *args)
+        for out, column in zip(results, result if outputs > 1 else (result,)):
+            out[:, j] = column
+    return results if outputs > 1 else results[0]
+
+
+def warm_up():
+    """
+    Compile every kernel for float32 and float64 arrays up front, e.g. once before starting
+    worker threads, so the first tickers do not all wait on numba compiling (or loading its
+    on-disk cache) in the middle of a run. Does nothing without numba.
+    """
+    if njit is None:
+        return
+    for dtype in (np.float32, np.float64):
+        values = np.ones(4, dtype=dtype)
+        ewm_mean(values, 2)
+        ewm_mean_diff(values, 2, 3)
+        trix(values, 2)
+        rolling_sum(values, 2)
+        money_flow_sums(values, values, values, values, 2)
+        # market_data holds float32 prices with float64 volumes.
+        money_flow_sums(values, values, values, values.astype(np.float64), 2)
+        rolling_mean_var(values, 2)
+        rolling_beta(values, values, 2)
+        rolling_skew_kurt(values, 2)
@@ -0,0 +1,32 @@
+import threading
+
+# Guards the creation of the per-instance locks only, never a computation.
+_locks_guard = threading.Lock()
+
+
+class cached_per_instance:
+    """
+    Like functools.cached_property, computing the attribute on first access and storing it on
+    the instance, but locked per instance and attribute. Before Python 3.12 cached_property
+    holds one lock for all instances, so threads computing the same attribute of different
+    instances (e.g. one FactorsWrapper per ticker) would wait on each other.
+    """
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        cache = instance.__dict__
+        if self.name in cache:
+            return cache[self.name]
+        with _locks_guard:
+            lock = cache.setdefault('_attribute_locks', {}).setdefault(self.name, threading.Lock())
+        with lock:
+            if self.name not in cache:
+                cache[self.name] = self.func(instance)
+        return cache[self.name]
@@ -1,4 +1,34 @@
+import numpy as np
 import pandas as pd
+from .validation import validate_columns
+from .kernels import by_column, rolling_mean_var, rolling_sum, trix
+from .price_bundle import PriceBundle
+
+def _lag(values, periods):
+    """
+    values moved forward by periods with NaN in front, like Series.shift(periods).
+    """
+    lagged = np.full_like(values, np.nan)
+    if periods < len(values):
+        lagged[periods:] = values[:len(values) - periods]
+    return lagged
+
+def _price_change(close, window=60):
+    """
+    Change of the close over window and that change relative to the earlier close,
+    from one lagged copy of the prices.
+    """
+    close_lag = _lag(close, window)
+    change = close - close_lag
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return change, change / close_lag
+
+def _price_level_ratio(rolling_mean, close, window=36):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return rolling_mean / _lag(close, window) - 1
+
+# Columns the market data frame must have.
+REQUIRED_COLUMNS = {'market': frozenset({'close', 'volume'})}
 
 class Momentum:
     """
@@ -6,47 +36,82 @@ class Momentum:
     
     Attributes:
         df (pd.DataFrame): DataFrame containing OHLCV market data
+        prices (PriceBundle): Returns and rolling statistics shared with the other market factor classes
     """
-    def __init__(self, df):
+    def __init__(self, df, prices=None):
         self.df = df
-        self.required_columns = {'close', 'volume'}
-        self._validate_columns()
+        validate_columns(REQUIRED_COLUMNS, {'market': df})
+        self.prices = prices if prices is not None else PriceBundle(df)
+
+    def _close(self):
+        return self.df['close'].to_numpy()
 
-    def _validate_columns(self):
-        missing_cols = self.required_columns - set(self.df.columns)
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
+    def _volume_quarterly(self, window=60):
+        return rolling_sum(self.df['volume'].to_numpy(), window)
+
+    def _price_level_ratio(self, close, window=36):
+        rolling_mean, _ = self.prices.close_stats(window)
+        return _price_level_ratio(rolling_mean, close, window)
 
     def calculate_rate_of_change(self, window=60):
-        self.df['ROC60'] = (self.df['close'] - self.df['close'].shift(window)) / self.df['close'].shift(window)
+        _, self.df['ROC60'] = _price_change(self._close(), window)
         return self.df
 
     def calculate_volume_quarterly(self, window=60):
-        self.df['Volume1Q'] = self.df['volume'].rolling(window=window).sum()
+        self.df['Volume1Q'] = self._volume_quarterly(window)
         return self.df
 
     def calculate_trix(self, span=30):
-        triple_ema = self.df['close'].ewm(span=span).mean().ewm(span=span).mean().ewm(span=span).mean()
-        self.df['TRIX30'] = triple_ema.pct_change(periods=1)
+        self.df['TRIX30'] = trix(self.prices.close, span)
         return self.df
 
     def calculate_price_quarterly(self, window=60):
-        self.df['Price1Q'] = self.df['close'] - self.df['close'].shift(window)
+        self.df['Price1Q'], _ = _price_change(self._close(), window)
         return self.df
 
     def calculate_price_level_ratio(self, window=36):
-        self.df['PLRC36'] = self.df['close'].rolling(window=window).mean() / self.df['close'].shift(window) - 1
+        self.df['PLRC36'] = self._price_level_ratio(self._close(), window)
         return self.df
 
     def calculate_all_factors(self):
         try:
-            self.calculate_rate_of_change()
-            self.calculate_volume_quarterly()
-            self.calculate_trix()
-            self.calculate_price_quarterly()
-            self.calculate_price_level_ratio()
-            momentum_columns = ['date','ROC60', 'Volume1Q', 'TRIX30', 'Price1Q', 'PLRC36']
-            return self.df[momentum_columns]
+            # The close is read once and ROC60 and Price1Q share its 60-day lag; the result
+            # is built straight from the factor arrays and self.df is left unchanged.
+            close = self._close()
+            price_change, rate_of_change = _price_change(close)
+            return pd.DataFrame({
+                'date': self.df['date'],
+                'ROC60': rate_of_change,
+                'Volume1Q': self._volume_quarterly(),
+                'TRIX30': trix(self.prices.close, 30),
+                'Price1Q': price_change,
+                'PLRC36': self._price_level_ratio(close),
+            }, index=self.df.index)
         except Exception as e:
             print(f"Error calculating momentum factors: {e}")
             return pd.DataFrame()
+
+    @classmethod
+    def panel(cls, close, volume):
+        """
+        Calculate the momentum factors for many tickers at once from price panels, without
+        building a Momentum and price bundle per ticker. The lag-based factors are computed
+        on the whole panel at once and the rolling kernels run column by column.
+
+        :param close: Close prices, one row per date and one column per ticker
+        :param volume: Volumes aligned with close
+        :return: Dict of factor name to a DataFrame shaped like close
+        """
+        close_values = close.to_numpy()
+        close_float = close.to_numpy(dtype=np.float64)
+        price_change, rate_of_change = _price_change(close_values)
+        rolling_mean, _ = by_column(rolling_mean_var, [close_float], 36, outputs=2)
+        factors = {
+            'ROC60': rate_of_change,
+            'Volume1Q': by_column(rolling_sum, [volume.to_numpy()], 60),
+            'TRIX30': by_column(trix, [close_float], 30),
+            'Price1Q': price_change,
+            'PLRC36': _price_level_ratio(rolling_mean, close_values),
+        }
+        return {name: pd.DataFrame(values, index=close.index, columns=close.columns)
+                for name, values in factors.items()}
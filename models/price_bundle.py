@@ -0,0 +1,66 @@
+
+import numpy as np
+import pandas as pd
+from .kernels import rolling_mean_var, rolling_skew_kurt
+from .memo import cached_per_instance
+
+class PriceBundle:
+    """
+    Price-derived series shared by the market factor classes (Emotional, Risk, ...).
+
+    Each series is computed once, on first use, from the market data it was built from,
+    so the classes do not each recompute the same returns and rolling statistics.
+
+    Attributes:
+        market_data (pd.DataFrame): The OHLCV frame the series are derived from
+        close (np.ndarray): Close prices as float64
+    """
+    def __init__(self, market_data):
+        self.market_data = market_data
+        self.close = market_data['close'].to_numpy(dtype=np.float64)
+        self._return_stats = {}
+        self._return_moments = {}
+        self._close_stats = {}
+        self._volume_stats = {}
+
+    @cached_per_instance
+    def returns(self):
+        """Daily close-to-close returns, as close.pct_change()."""
+        return pd.Series(self.close).pct_change().to_numpy()
+
+    @cached_per_instance
+    def hl_range(self):
+        """Daily high - low range, in the stored dtype as the pandas subtraction gives it."""
+        return np.subtract(self.market_data['high'].to_numpy(), self.market_data['low'].to_numpy())
+
+    def return_stats(self, window):
+        """
+        Rolling mean and sample variance of the returns over window, computed once per window.
+        """
+        if window not in self._return_stats:
+            self._return_stats[window] = rolling_mean_var(self.returns, window)
+        return self._return_stats[window]
+
+    def return_moments(self, window):
+        """
+        Rolling skewness and excess kurtosis of the returns over window, computed once per window.
+        """
+        if window not in self._return_moments:
+            self._return_moments[window] = rolling_skew_kurt(self.returns, window)
+        return self._return_moments[window]
+
+    def close_stats(self, window):
+        """
+        Rolling mean and sample variance of the close prices over window, computed once per window.
+        """
+        if window not in self._close_stats:
+            self._close_stats[window] = rolling_mean_var(self.close, window)
+        return self._close_stats[window]
+
+    def volume_stats(self, window):
+        """
+        Rolling mean and sample variance of the volume over window, computed once per window.
+        """
+        if window not in self._volume_stats:
+            self._volume_stats[window] = rolling_mean_var(self.market_data['volume'].to_numpy(), window)
+        return self._volume_stats[window]
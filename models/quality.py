@@ -1,205 +1,99 @@
 import pandas as pd
 import numpy as np
+from .validation import validate_columns
+from .statements import columns, date_positions, lag_positions, rows_at, safe_div, sort_by_date, ttm_columns
+
+# Columns each input frame must have.
+REQUIRED_COLUMNS = {
+    'income': frozenset({'date', 'netIncome', 'revenue', 'grossProfit'}),
+    'balance': frozenset({'date', 'totalStockholdersEquity', 'totalAssets', 'totalDebt', 'totalLiabilities', 'inventory', "accountPayables"}),
+    'cash_flow': frozenset({'date', 'operatingCashFlow'})
+}
 
 class Quality:
     """
     A class to calculate quality-related financial factors.
     """
     def __init__(self, income_data, balance_data, cash_flow_data):
-        self.income_data_master = income_data
-        self.balance_data_master = balance_data
-        self.cash_flow_data_master = cash_flow_data
-        self.required_columns = {
-            'income': {'netIncome', 'revenue', 'grossProfit'},
-            'balance': {'totalStockholdersEquity', 'totalAssets', 'totalDebt', 'totalLiabilities', 'inventory', "accountPayables"},
-            'cash_flow': {'operatingCashFlow'}
-        }
-        self._validate_columns()
-
-    def _validate_columns(self):
-        missing_cols = []
-        for col in self.required_columns['income']:
-            if col not in self.income_data_master.columns:
-                missing_cols.append(f"Income: {col}")
-        for col in self.required_columns['balance']:
-            if col not in self.balance_data_master.columns:
-                missing_cols.append(f"Balance: {col}")
-        for col in self.required_columns['cash_flow']:
-            if col not in self.cash_flow_data_master.columns:
-                missing_cols.append(f"Cash Flow: {col}")
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {', '.join(missing_cols)}")
-    
-    def safe_get_value_ttm(self, df, column):
-
-        if df.empty or column not in df.columns:
-            return np.nan
-        try:
-            # Ensure there are at least 4 quarters available
-            if len(df) < 4:
-                return df[column].iloc[:len(df)].sum()
-            # Sum the values of the first 4 rows (most recent four quarters)
-            return df[column].iloc[:4].sum()
-        
-        except Exception:
-            return np.nan
-        
-    def calculate_net_profit_to_revenue(self):
-        if self.income_data is None:
-            return np.nan
-        
-        revenue_ttm = self.safe_get_value_ttm(self.income_data, 'revenue')
-        if pd.isna(revenue_ttm) or revenue_ttm == 0:
-            return np.nan
-
-        # Get TTM net income.
-        net_income_ttm = self.safe_get_value_ttm(self.income_data, 'netIncome')
-
-        # Return the TTM net profit to revenue ratio.
-        return net_income_ttm / revenue_ttm
-
-    # to be changed
-    def calculate_decm(self):
-        if self.prev_balance_data is None or self.prev_balance_data.empty or self.prev_balance_data['inventory'].iloc[0] == 0:
-            prev_inventory = 0
-        else:
-            prev_inventory = self.prev_balance_data['inventory'].iloc[0]
-        
-        if self.prev_balance_data is None or self.prev_balance_data.empty or self.prev_balance_data['accountPayables'].iloc[0] == 0:
-            prev_acc_payables = 0
-        else:
-            prev_acc_payables = self.prev_balance_data['accountPayables'].iloc[0]
-
-        if self.balance_data is None or self.balance_data.empty or self.balance_data['inventory'].iloc[0] == 0:
-            curr_inventory = 0
-        else:
-            curr_inventory = self.balance_data['inventory'].iloc[0]
-        
-        if self.balance_data is None or self.balance_data.empty or self.balance_data['accountPayables'].iloc[0] == 0:
-            curr_acc_payables = 0
-        else:
-            curr_acc_payables = self.balance_data['accountPayables'].iloc[0]
-        
-        if self.balance_data is None or self.balance_data['totalAssets'].iloc[0] == 0:
-            return np.nan
-        
-        decm = curr_acc_payables + curr_inventory - prev_acc_payables - prev_inventory 
-
-        return decm/self.balance_data['totalAssets'].iloc[0]
-
-    def calculate_roe(self):
-        if self.balance_data is None or self.balance_data['totalStockholdersEquity'].iloc[0] == 0:
-            return np.nan
-        
-        net_income_ttm = self.safe_get_value_ttm(self.income_data, 'netIncome')
-
-        return net_income_ttm / self.balance_data['totalStockholdersEquity'].iloc[0]
+        validate_columns(REQUIRED_COLUMNS, {'income': income_data, 'balance': balance_data,
+                                            'cash_flow': cash_flow_data})
+        # Sorted by date once, so calculate_all_factors can locate dates by binary search.
+        self.income_data_master = sort_by_date(income_data)
+        self.balance_data_master = sort_by_date(balance_data)
+        self.cash_flow_data_master = sort_by_date(cash_flow_data)
 
-    def calculate_roa(self):
-        if self.prev_balance_data is None or self.prev_balance_data['totalAssets'].iloc[0] == 0:
-            return np.nan
-        
-        if self.balance_data is None or self.balance_data['totalAssets'].iloc[0] == 0:
-            return np.nan
-        
-        net_income_ttm = self.safe_get_value_ttm(self.income_data, 'netIncome')
-
-        return net_income_ttm / (self.balance_data['totalAssets'].iloc[0] + self.prev_balance_data['totalAssets'].iloc[0])
-
-    def calculate_gmi(self):
-        if self.prev_income_data is None or self.prev_income_data.empty or self.prev_income_data['revenue'].iloc[0] == 0:
-            prev_gross_margin = 0
-        else:
-            prev_gross_margin = self.prev_income_data['grossProfit'].iloc[0] / self.prev_income_data['revenue'].iloc[0]
-        if self.income_data.empty or self.income_data['revenue'].iloc[0] == 0:
-            return np.nan
-        current_gross_margin = self.income_data['grossProfit'].iloc[0] / self.income_data['revenue'].iloc[0]
-        return current_gross_margin - prev_gross_margin
-
-    # to be changed
-    def calculate_acca(self):
-        # Check if balance data is empty or if total assets is zero to avoid division by zero.
-        if self.balance_data.empty or self.balance_data['totalAssets'].iloc[0] == 0:
-            return np.nan
-
-        # Retrieve TTM net income from the income data.
-        net_income_ttm = self.safe_get_value_ttm(self.income_data, 'netIncome')
-        
-        # Retrieve TTM operating cash flow from the cash flow data.
-        operating_cf_ttm = self.safe_get_value_ttm(self.cash_flow_data, 'operatingCashFlow')
-
-        # Calculate ACCA on a TTM basis.
-        return (net_income_ttm - operating_cf_ttm) / self.balance_data['totalAssets'].iloc[0]
-
-    # debt to asset ratio
-    def calculate_debtToAsset(self):
-        if self.balance_data is None or self.balance_data['totalAssets'].iloc[0] == 0:
-            return np.nan
-        
-        return self.balance_data['totalDebt'].iloc[0] / self.balance_data['totalAssets'].iloc[0]
-
-    
     def calculate_all_factors(self):
-        try:
-            factors = []
-
-            for _, income_row in self.income_data_master.iterrows():
-                date = income_row['date']
-                self.income_data = self.income_data_master[self.income_data_master['date'] == date]
-                self.balance_data = self.balance_data_master[self.balance_data_master['date'] == date]
-                self.cash_flow_data = self.cash_flow_data_master[self.cash_flow_data_master['date'] == date]
-
-                # For income data:
-                income_subset = self.income_data_master[self.income_data_master['date'] < date]
-                if not income_subset.empty:
-                    available = income_subset.iloc[-4:]
-                    if len(available) < 4:
-                        num_missing = 4 - len(available)
-                        pad = pd.DataFrame({col: [np.nan] * num_missing for col in income_subset.columns})
-                        self.prev_income_data = pd.concat([pad, available], ignore_index=True)
-                    else:
-                        self.prev_income_data = available
-                else:
-                    self.prev_income_data = None
-
-                # For balance data:
-                balance_subset = self.balance_data_master[self.balance_data_master['date'] < date]
-                if not balance_subset.empty:
-                    available = balance_subset.iloc[-4:]
-                    if len(available) < 4:
-                        num_missing = 4 - len(available)
-                        pad = pd.DataFrame({col: [np.nan] * num_missing for col in balance_subset.columns})
-                        self.prev_balance_data = pd.concat([pad, available], ignore_index=True)
-                    else:
-                        self.prev_balance_data = available
-                else:
-                    self.prev_balance_data = None
+        """
+        Calculate the quality factors for every income statement date with one batch() call.
 
-                # For cash flow data:
-                cash_flow_subset = self.cash_flow_data_master[self.cash_flow_data_master['date'] < date]
-                if not cash_flow_subset.empty:
-                    available = cash_flow_subset.iloc[-4:]
-                    if len(available) < 4:
-                        num_missing = 4 - len(available)
-                        pad = pd.DataFrame({col: [np.nan] * num_missing for col in cash_flow_subset.columns})
-                        self.prev_cash_flow_data = pd.concat([pad, available], ignore_index=True)
-                    else:
-                        self.prev_cash_flow_data = available
-                else:
-                    self.prev_cash_flow_data = None
+        Every date is located in the date-sorted frames by binary search,
+        instead of filtering the frames with boolean masks date by date. The previous values
+        are those four periods earlier: 0 when there is no earlier statement at all, missing
+        when there are fewer than four.
 
-                factors.append({
-                    'date': date,
-                    'net_profit_to_total_revenue': self.calculate_net_profit_to_revenue(),
-                    'DECM': self.calculate_decm(),
-                    'ROE': self.calculate_roe(),
-                    'ROA': self.calculate_roa(),
-                    'ACCA': self.calculate_acca(),
-                    'GMI': self.calculate_gmi(),
-                    'DtoA': self.calculate_debtToAsset()
-                })
-                
-            return pd.DataFrame(factors)
-        except Exception as e:
-            print(f"Error calculating quality factors: {e}")
+        :raises ValueError: If an income statement date has no balance sheet
+        """
+        if self.income_data_master.empty:
             return pd.DataFrame()
+        dates = self.income_data_master['date'].to_numpy()
+        frames = {}
+        prev_frames = {}
+        for name, required in REQUIRED_COLUMNS.items():
+            names = sorted(required - {'date'})
+            df = getattr(self, f"{name}_data_master")
+            current, prior = date_positions(df['date'].to_numpy(), dates)
+            if name == 'balance' and (current < 0).any():
+                raise ValueError(f"No balance sheet dated {dates[np.argmax(current < 0)]}")
+            frames[name] = rows_at(df, current, names)
+            prev_frames[name] = rows_at(df, lag_positions(prior, 4), names)
+            prev_frames[name].loc[prior == 0, names] = 0
+        factors = self.batch(frames['income'], frames['balance'], frames['cash_flow'],
+                             prev_income=prev_frames['income'], prev_balance=prev_frames['balance'])
+        factors.insert(0, 'date', dates)
+        return factors
+
+    @classmethod
+    def batch(cls, income, balance, cash_flow, prev_income=None, prev_balance=None):
+        """
+        Calculate the quality factors for many row-aligned statements at once, e.g. one row per
+        ticker, with each factor computed as one array operation instead of per-row method calls.
+
+        :param income: Income statements, one row per entry
+        :param balance: Balance sheets aligned row by row with income
+        :param cash_flow: Cash flow statements aligned row by row with income
+        :param prev_income: Income statements four periods earlier, or None if there are none
+        :param prev_balance: Balance sheets four periods earlier, or None if there are none
+        :return: DataFrame of the quality factors, indexed like income
+        """
+        n = len(income)
+        revenue, gross_profit = columns(income, ['revenue', 'grossProfit'])
+        total_assets, equity, total_debt, inventory, acc_payables = columns(
+            balance, ['totalAssets', 'totalStockholdersEquity', 'totalDebt', 'inventory', 'accountPayables'])
+        net_income_ttm, revenue_ttm = ttm_columns(income, ['netIncome', 'revenue'])
+        operating_cf_ttm, = ttm_columns(cash_flow, ['operatingCashFlow'])
+        # Without earlier periods the previous values count as 0, as in calculate_all_factors.
+        if prev_income is not None:
+            prev_revenue, prev_gross_profit = columns(prev_income, ['revenue', 'grossProfit'])
+        else:
+            prev_revenue = prev_gross_profit = np.zeros(n)
+        if prev_balance is not None:
+            prev_total_assets, prev_inventory, prev_acc_payables = columns(
+                prev_balance, ['totalAssets', 'inventory', 'accountPayables'])
+        else:
+            prev_total_assets = prev_inventory = prev_acc_payables = np.zeros(n)
+
+        decm = acc_payables + inventory - prev_acc_payables - prev_inventory
+        prev_gross_margin = np.where(prev_revenue == 0, 0, safe_div(prev_gross_profit, prev_revenue))
+        # ROA needs both periods' total assets to be non-zero.
+        roa_assets = np.where(prev_total_assets == 0, 0, total_assets + prev_total_assets)
+        roa_assets = np.where(total_assets == 0, 0, roa_assets)
+        factors = {
+            'net_profit_to_total_revenue': safe_div(net_income_ttm, revenue_ttm),
+            'DECM': safe_div(decm, total_assets),
+            'ROE': safe_div(net_income_ttm, equity),
+            'ROA': safe_div(net_income_ttm, roa_assets),
+            'ACCA': safe_div(net_income_ttm - operating_cf_ttm, total_assets),
+            'GMI': safe_div(gross_profit, revenue) - prev_gross_margin,
+            'DtoA': safe_div(total_debt, total_assets),
+        }
+        return pd.DataFrame(factors, index=income.index)
@@ -1,4 +1,10 @@
+import numpy as np
 import pandas as pd
+from .validation import validate_columns
+from .price_bundle import PriceBundle
+
+# Columns the market data frame must have.
+REQUIRED_COLUMNS = {'market': frozenset({'close'})}
 
 class Risk:
     """
@@ -8,50 +14,58 @@ class Risk:
         df (pd.DataFrame): DataFrame containing market data
         risk_free_rate_20 (float): 20-day risk-free rate
         risk_free_rate_60 (float): 60-day risk-free rate
+        prices (PriceBundle): Returns and rolling statistics shared with the other market factor classes
     """
-    def __init__(self, df, risk_free_rate_20=0.02, risk_free_rate_60=0.02):
+    def __init__(self, df, risk_free_rate_20=0.02, risk_free_rate_60=0.02, prices=None):
         self.df = df
         self.risk_free_rate_20 = risk_free_rate_20
         self.risk_free_rate_60 = risk_free_rate_60
-        self.required_columns = {'close'}
-        self._validate_columns()
+        validate_columns(REQUIRED_COLUMNS, {'market': df})
+        self.prices = prices if prices is not None else PriceBundle(df)
 
-    def _validate_columns(self):
-        missing_cols = self.required_columns - set(self.df.columns)
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
+    def _sharpe_ratio(self, window, risk_free_rate):
+        mean, variance = self.prices.return_stats(window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (mean - risk_free_rate) / np.sqrt(variance)
 
     def calculate_variance(self, window=60):
-        self.df['Variance60'] = self.df['close'].pct_change().rolling(window=window).var()
+        _, variance = self.prices.return_stats(window)
+        self.df['Variance60'] = variance
         return self.df
 
     def calculate_sharpe_ratio_20(self):
-        returns = self.df['close'].pct_change()
-        self.df['sharpe_ratio_20'] = (returns.rolling(window=20).mean() - self.risk_free_rate_20) / returns.rolling(window=20).std()
+        self.df['sharpe_ratio_20'] = self._sharpe_ratio(20, self.risk_free_rate_20)
         return self.df
 
     def calculate_kurtosis(self, window=60):
-        self.df['Kurtosis60'] = self.df['close'].pct_change().rolling(window=window).kurt()
+        _, kurtosis = self.prices.return_moments(window)
+        self.df['Kurtosis60'] = kurtosis
         return self.df
 
     def calculate_skewness(self, window=60):
-        self.df['Skewness60'] = self.df['close'].pct_change().rolling(window=window).skew()
+        skewness, _ = self.prices.return_moments(window)
+        self.df['Skewness60'] = skewness
         return self.df
 
     def calculate_sharpe_ratio_60(self):
-        returns = self.df['close'].pct_change()
-        self.df['sharpe_ratio_60'] = (returns.rolling(window=60).mean() - self.risk_free_rate_60) / returns.rolling(window=60).std()
+        self.df['sharpe_ratio_60'] = self._sharpe_ratio(60, self.risk_free_rate_60)
         return self.df
 
     def calculate_all_factors(self):
         try:
-            self.calculate_variance()
-            self.calculate_sharpe_ratio_20()
-            self.calculate_kurtosis()
-            self.calculate_skewness()
-            self.calculate_sharpe_ratio_60()
-            risk_columns = ['date','Variance60', 'sharpe_ratio_20', 'Kurtosis60', 'Skewness60', 'sharpe_ratio_60']
-            return self.df[risk_columns]
+            # The 20/60-day mean and variance and the 60-day skewness and kurtosis each come
+            # from one pass over the returns in the price bundle; the result is built straight
+            # from the factor arrays and self.df is left unchanged.
+            _, variance = self.prices.return_stats(60)
+            skewness, kurtosis = self.prices.return_moments(60)
+            return pd.DataFrame({
+                'date': self.df['date'],
+                'Variance60': variance,
+                'sharpe_ratio_20': self._sharpe_ratio(20, self.risk_free_rate_20),
+                'Kurtosis60': kurtosis,
+                'Skewness60': skewness,
+                'sharpe_ratio_60': self._sharpe_ratio(60, self.risk_free_rate_60),
+            }, index=self.df.index)
         except Exception as e:
             print(f"Error calculating risk factors: {e}")
             return pd.DataFrame()
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# Helpers for the batch() classmethods of the statement factor classes (Quality, Value,
+# Stock, Growth), which take row-aligned frames and compute each factor as one array op.
+
+
+def columns(df, names):
+    """
+    The named columns of df as arrays, read by position from the frame in a single block
+    rather than looked up one label at a time. Columns df lacks are NaN for every row.
+    """
+    positions = df.columns.get_indexer(names)
+    block = iter(df.iloc[:, positions[positions >= 0]].to_numpy().T)
+    missing = np.full(len(df), np.nan)
+    return [next(block) if position >= 0 else missing for position in positions]
+
+
+def present(df):
+    """
+    Rows of df that hold a statement: those with a date, or every row if df has no date column.
+    """
+    if 'date' not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    return df['date'].notna().to_numpy()
+
+
+def ttm_columns(df, names):
+    """
+    Per-row trailing values of the named columns when each row is a single statement:
+    missing values count as 0, and rows without a statement or columns the
+    frame lacks give NaN.
+    """
+    rows = present(df)
+    return [np.where(rows, np.nan_to_num(values, nan=0.0), np.nan) if name in df.columns else values
+            for name, values in zip(names, columns(df, names))]
+
+
+def safe_div(numerator, denominator):
+    """
+    numerator / denominator element-wise, NaN wherever the denominator is 0, without warnings.
+    """
+    numerator, denominator = np.broadcast_arrays(numerator, denominator)
+    out = np.full(numerator.shape, np.nan, dtype=np.result_type(numerator, denominator, np.float32))
+    return np.divide(numerator, denominator, out=out, where=denominator != 0)
+
+
+def sort_by_date(df):
+    """
+    df ordered by date, keeping the original order among rows with the same date.
+    A frame without a date column is returned as it is.
+    """
+    if 'date' not in df.columns:
+        return df
+    return df.sort_values('date', kind='stable', ignore_index=True)
+
+
+def ticker_date_keys(df, ticker_column):
+    """
+    A "ticker date" string key per row of df, so rows that stack several tickers sort by
+    ticker and then date and can be searched like dates.
+    """
+    return (df[ticker_column].astype(str) + ' ' + df['date'].astype(str)).to_numpy()
+
+
+def date_positions(dates, at):
+    """
+    For each date in at, the position in the sorted array dates of the first statement dated
+    exactly then (-1 if there is none), and the number of statements dated before it.
+    """
+    prior = np.searchsorted(dates, at, side='left')
+    if len(dates) == 0:
+        return np.full(len(at), -1), prior
+    exact = (prior < len(dates)) & (dates[np.minimum(prior, len(dates) - 1)] == at)
+    return np.where(exact, prior, -1), prior
+
+
+def asof_positions(dates, at):
+    """
+    For each date in at, the position in the sorted array dates of the first statement of the
+    latest date on or before it, or -1 if every statement is dated later.
+    """
+    latest = np.searchsorted(dates, at, side='right') - 1
+    if len(dates) == 0:
+        return latest
+    return np.where(latest >= 0, np.searchsorted(dates, dates[np.maximum(latest, 0)], side='left'), -1)
+
+
+def lag_positions(prior, periods):
+    """
+    For each count of earlier statements in prior, the position of the statement periods before,
+    or -1 where there are fewer earlier statements than that.
+    """
+    return np.where(prior >= periods, prior - periods, -1)
+
+
+def rows_at(df, positions, names):
+    """
+    A frame of the named columns of df, one row per position, with missing values (and no date)
+    for negative positions. Numeric columns keep their dtype where it holds NaN.
+    """
+    found = positions >= 0
+    frame = {}
+    for name, values in zip(names, columns(df, names)):
+        out = np.full(len(positions), np.nan, dtype=np.result_type(values.dtype, np.float32))
+        out[found] = values[positions[found]]
+        frame[name] = out
+    if 'date' in df.columns:
+        dates = np.full(len(positions), np.nan, dtype=object)
+        dates[found] = df['date'].to_numpy()[positions[found]]
+        frame['date'] = dates
+    return pd.DataFrame(frame)
@@ -1,175 +1,127 @@
 import pandas as pd
 import numpy as np
+from .validation import validate_columns
+from .statements import (asof_positions, columns, date_positions, rows_at, safe_div, sort_by_date,
+                         ticker_date_keys, ttm_columns)
+
+# Columns each input frame must have.
+REQUIRED_COLUMNS = {
+    'income': frozenset({'date', 'eps', 'weightedAverageShsOut'}),
+    'balance': frozenset({'date', 'totalStockholdersEquity', 'retainedEarnings'}),
+    'cash_flow': frozenset({'date', 'operatingCashFlow', 'freeCashFlow'}),
+    'market': frozenset({'date', 'close'}),
+}
+
+# Market data columns batch() reads.
+MARKET_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
 
 class Stock:
     """
     A class to calculate stock-related financial factors.
     """
     def __init__(self, income_data, balance_data, cash_flow_data, market_data):
-        self.income_data_master = income_data
-        self.balance_data_master = balance_data
-        self.cash_flow_data_master = cash_flow_data
-        self.market_data_master = market_data
-        self.required_columns = {
-            'income': {'eps', 'weightedAverageShsOut'},
-            'balance': {'totalStockholdersEquity', 'retainedEarnings'},
-            'cash_flow': {'operatingCashFlow', 'freeCashFlow'},
-            'market': {'close'},
-        }
-        self._validate_columns()
-
-    def _validate_columns(self):
-        missing_cols = []
-        for df_name, columns in self.required_columns.items():
-            df = getattr(self, f"{df_name}_data_master")
-            for col in columns:
-                if col not in df.columns:
-                    missing_cols.append(f"{df_name}: {col}")
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {', '.join(missing_cols)}")
-
-    def safe_get_value(self, df, column):
-        if df.empty or column not in df.columns:
-            return np.nan
-        try:
-            return df[column].iloc[0]
-        except Exception:
-            return np.nan
-    
-    def safe_get_value_ttm(self, df, column):
-        if df.empty or column not in df.columns:
-            return np.nan
-        try:
-            # Ensure there are at least 4 quarters available
-            if len(df) < 4:
-                return df[column].iloc[:len(df)].sum()
-            # Sum the values of the first 4 rows (most recent four quarters)
-            return df[column].iloc[:4].sum()
-        
-        except Exception:
-            return np.nan
-
-    def calculate_net_asset_per_share(self):
-        weighted_shares = self.safe_get_value(self.income_data, 'weightedAverageShsOut')
-        if pd.isna(weighted_shares) or weighted_shares == 0:
-            return np.nan
-        return self.safe_get_value(self.balance_data, 'totalStockholdersEquity') / weighted_shares
-    
-    def calculate_net_operate_cash_flow_per_share(self):
-        weighted_shares = self.safe_get_value(self.income_data, 'weightedAverageShsOut')
-        if pd.isna(weighted_shares) or weighted_shares == 0:
-            return np.nan
-        
-        return self.safe_get_value_ttm(self.cash_flow_data, 'operatingCashFlow') / weighted_shares
+        validate_columns(REQUIRED_COLUMNS, {'income': income_data, 'balance': balance_data,
+                                            'cash_flow': cash_flow_data, 'market': market_data})
+        # Sorted by date once, so calculate_all_factors can locate dates by binary search.
+        self.income_data_master = sort_by_date(income_data)
+        self.balance_data_master = sort_by_date(balance_data)
+        self.cash_flow_data_master = sort_by_date(cash_flow_data)
+        self.market_data_master = sort_by_date(market_data)
 
-    # to be changed
-    def calculate_eps(self):
-        return self.safe_get_value_ttm(self.income_data, 'eps')
-
-    def calculate_retained_earnings_per_share(self):
-        weighted_shares = self.safe_get_value(self.income_data, 'weightedAverageShsOut')
-        if pd.isna(weighted_shares) or weighted_shares == 0:
-            return np.nan
-        return self.safe_get_value(self.balance_data, 'retainedEarnings') / weighted_shares
-    
-    # to be fully removed
-    def calculate_freecashflow_per_share(self):
-        weighted_shares = self.safe_get_value(self.income_data, 'weightedAverageShsOut')
-        if pd.isna(weighted_shares) or weighted_shares == 0:
-            return np.nan
-        return self.safe_get_value_ttm(self.cash_flow_data, 'freeCashFlow') / weighted_shares
-    
-    def calculate_liquidity(self):
-        weighted_shares = self.safe_get_value(self.income_data, 'weightedAverageShsOut')
-        if pd.isna(weighted_shares) or weighted_shares == 0:
-            return np.nan
-        
-        return self.safe_get_value(self.market_data, 'volume') / weighted_shares
+    def calculate_all_factors(self):
+        """
+        Calculate the stock factors for every income statement date with one batch() call.
 
-    def calculate_market_cap(self):
-        weighted_shares = self.safe_get_value(self.income_data, 'weightedAverageShsOut')
-        close_price = self.safe_get_value(self.market_data, 'close')
-        if pd.isna(weighted_shares) or pd.isna(close_price):
-            return np.nan
-        return weighted_shares * close_price
+        Every date is located in the date-sorted frames by binary search, instead of
+        filtering the frames date by date. The market data is that of the date itself or
+        else the latest before it, and missing if there is none.
+        """
+        if self.income_data_master.empty:
+            return pd.DataFrame()
+        dates = self.income_data_master['date'].to_numpy()
+        frames = {}
+        for name, required in REQUIRED_COLUMNS.items():
+            df = getattr(self, f"{name}_data_master")
+            if name == 'market':
+                positions = asof_positions(df['date'].to_numpy(), dates)
+                names = list(MARKET_COLUMNS)
+            else:
+                positions, _ = date_positions(df['date'].to_numpy(), dates)
+                names = sorted(required - {'date'})
+            frames[name] = rows_at(df, positions, names)
+        factors = self.batch(frames['income'], frames['balance'], frames['cash_flow'], frames['market'])
+        factors.insert(0, 'date', dates)
+        return factors
 
-    def calculate_all_factors(self):
-        factors = []
-        for _, income_row in self.income_data_master.iterrows():
-            try:
-                date = income_row['date']
-                self.income_data = self.income_data_master[self.income_data_master['date'] == date]
-                self.balance_data = self.balance_data_master[self.balance_data_master['date'] == date]
-                self.cash_flow_data = self.cash_flow_data_master[self.cash_flow_data_master['date'] == date]
-                if date in self.market_data_master['date'].values:
-                    self.market_data = self.market_data_master[self.market_data_master['date'] == date]
-                else:
-                    prev_dates = self.market_data_master[self.market_data_master['date'] < date]
-                    if prev_dates.empty:
-                        # Use a row of NaNs if no market data is available.
-                        market_row = pd.Series({'open': np.nan, 'high': np.nan, 'low': np.nan, 'close': np.nan, 'volume': np.nan})
-                        self.market_data = pd.DataFrame([market_row])
-                    else:
-                        prev_date = prev_dates['date'].max()
-                        self.market_data = self.market_data_master[self.market_data_master['date'] == prev_date]
-                # For income data:
-                income_subset = self.income_data_master[self.income_data_master['date'] < date]
-                if not income_subset.empty:
-                    available = income_subset.iloc[-4:]
-                    if len(available) < 4:
-                        num_missing = 4 - len(available)
-                        pad = pd.DataFrame({col: [np.nan] * num_missing for col in income_subset.columns})
-                        self.prev_income_data = pd.concat([pad, available], ignore_index=True)
-                    else:
-                        self.prev_income_data = available
-                else:
-                    self.prev_income_data = None
+    @classmethod
+    def batch(cls, income, balance, cash_flow, market):
+        """
+        Calculate the stock factors for many row-aligned statements at once, e.g. one row per
+        ticker, with each factor computed as one array operation instead of per-row method calls.
 
-                # For balance data:
-                balance_subset = self.balance_data_master[self.balance_data_master['date'] < date]
-                if not balance_subset.empty:
-                    available = balance_subset.iloc[-4:]
-                    if len(available) < 4:
-                        num_missing = 4 - len(available)
-                        pad = pd.DataFrame({col: [np.nan] * num_missing for col in balance_subset.columns})
-                        self.prev_balance_data = pd.concat([pad, available], ignore_index=True)
-                    else:
-                        self.prev_balance_data = available
-                else:
-                    self.prev_balance_data = None
+        :param income: Income statements, one row per entry
+        :param balance: Balance sheets aligned row by row with income
+        :param cash_flow: Cash flow statements aligned row by row with income
+        :param market: Market data (OHLCV) aligned row by row with income
+        :return: DataFrame of the stock factors, indexed like income
+        """
+        weighted_shares, = columns(income, ['weightedAverageShsOut'])
+        eps_ttm, = ttm_columns(income, ['eps'])
+        equity, retained_earnings = columns(balance, ['totalStockholdersEquity', 'retainedEarnings'])
+        operating_cf_ttm, free_cf_ttm = ttm_columns(cash_flow, ['operatingCashFlow', 'freeCashFlow'])
+        open_price, high, low, close_price, volume = columns(market, ['open', 'high', 'low', 'close', 'volume'])
+        factors = {
+            'open': open_price,
+            'high': high,
+            'low': low,
+            'close': close_price,
+            'volume': volume,
+            'net_asset_per_share': safe_div(equity, weighted_shares),
+            'net_operate_cash_flow_per_share': safe_div(operating_cf_ttm, weighted_shares),
+            'eps': eps_ttm,
+            'retained_earnings_per_share': safe_div(retained_earnings, weighted_shares),
+            'cashflow_per_share': safe_div(free_cf_ttm, weighted_shares),
+            'liquidity': safe_div(volume, weighted_shares),
+            'market_cap': weighted_shares * close_price,
+        }
+        return pd.DataFrame(factors, index=income.index)
 
-                # For cash flow data:
-                cash_flow_subset = self.cash_flow_data_master[self.cash_flow_data_master['date'] < date]
-                if not cash_flow_subset.empty:
-                    available = cash_flow_subset.iloc[-4:]
-                    if len(available) < 4:
-                        num_missing = 4 - len(available)
-                        pad = pd.DataFrame({col: [np.nan] * num_missing for col in cash_flow_subset.columns})
-                        self.prev_cash_flow_data = pd.concat([pad, available], ignore_index=True)
-                    else:
-                        self.prev_cash_flow_data = available
-                else:
-                    self.prev_cash_flow_data = None
+    @classmethod
+    def universe(cls, income, balance, cash_flow, market, ticker_column='ticker'):
+        """
+        Calculate the stock factors of many tickers in one pass from frames that stack every
+        ticker's rows, instead of one Stock per ticker. Each income statement is matched with
+        its ticker's statements of the same date and the ticker's market data of that date or
+        the latest before it, and all factors come from a single batch() call.
 
-                factors.append({
-                    'date': date,
-                    'open': self.safe_get_value(self.market_data, 'open'),
-                    'high': self.safe_get_value(self.market_data, 'high'),
-                    'low': self.safe_get_value(self.market_data, 'low'),
-                    'close': self.safe_get_value(self.market_data, 'close'),
-                    'volume': self.safe_get_value(self.market_data, 'volume'),
-                    'net_asset_per_share': self.calculate_net_asset_per_share(),
-                    'net_operate_cash_flow_per_share': self.calculate_net_operate_cash_flow_per_share(),
-                    'eps': self.calculate_eps(),
-                    'retained_earnings_per_share': self.calculate_retained_earnings_per_share(),
-                    'cashflow_per_share': self.calculate_freecashflow_per_share(),
-                    'liquidity': self.calculate_liquidity(),
-                    'market_cap': self.calculate_market_cap()
-                })
-            except Exception as e:
-                print(f"Error calculating stock factors for date {income_row['date']}: {e}")
-        try:
-            return pd.DataFrame(factors)
-        except Exception as e:
-            print(f"Error compiling stock factors: {e}")
-            return pd.DataFrame()
+        :param income: Income statements of all tickers
+        :param balance: Balance sheets of all tickers
+        :param cash_flow: Cash flow statements of all tickers
+        :param market: Market data (OHLCV) of all tickers
+        :param ticker_column: Column holding the ticker in every frame
+        :return: DataFrame of the ticker, date and stock factors, one row per income statement
+        """
+        frames = {'income': income, 'balance': balance, 'cash_flow': cash_flow, 'market': market}
+        validate_columns({name: required | {ticker_column} for name, required in REQUIRED_COLUMNS.items()}, frames)
+        at = ticker_date_keys(income, ticker_column)
+        tickers = income[ticker_column].to_numpy()
+        aligned = {}
+        for name, df in frames.items():
+            keys = ticker_date_keys(df, ticker_column)
+            order = np.argsort(keys, kind='stable')
+            df, keys = df.iloc[order].reset_index(drop=True), keys[order]
+            if name == 'market':
+                positions = asof_positions(keys, at)
+                if len(df):
+                    # Before a ticker's first market day the latest key is another ticker's.
+                    same_ticker = df[ticker_column].to_numpy()[np.maximum(positions, 0)] == tickers
+                    positions = np.where(same_ticker, positions, -1)
+                names = list(MARKET_COLUMNS)
+            else:
+                positions, _ = date_positions(keys, at)
+                names = sorted(REQUIRED_COLUMNS[name] - {'date'})
+            aligned[name] = rows_at(df, positions, names)
+        factors = cls.batch(aligned['income'], aligned['balance'], aligned['cash_flow'], aligned['market'])
+        factors.insert(0, 'date', income['date'].to_numpy())
+        factors.insert(0, ticker_column, tickers)
+        return factors
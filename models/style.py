@@ -1,48 +1,57 @@
 import pandas as pd
 import numpy as np
+from .validation import validate_columns
+from .kernels import by_column, rolling_beta
+
+def _growth_and_momentum(close, window):
+    """
+    Style.calculate_growth() and calculate_momentum() in one pass over the close array (or a
+    2-D panel with one column per ticker), sharing one log of the prices. Like pct_change(),
+    momentum carries the last close forward over missing prices.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_close = np.log(close)
+        growth = np.full(close.shape, np.nan, dtype=log_close.dtype)
+        momentum = np.full(close.shape, np.nan, dtype=log_close.dtype)
+        if window < len(close):
+            growth[window:] = log_close[window:] - log_close[:len(close) - window]
+            if np.isnan(close).any():
+                close = pd.DataFrame(close).ffill().to_numpy().reshape(close.shape)
+            momentum[window:] = close[window:] / close[:len(close) - window] - 1
+    return growth, momentum
+
+# Columns the market data frame must have.
+REQUIRED_COLUMNS = {'market': frozenset({'close', 'volume', 'date'})}
 
 class Style:
     """
     A class to calculate style-related market factors.
     """
     def __init__(self, df, sp500_returns, tickers):
-        self.df = df.copy()
-        self.sp500_returns = sp500_returns.copy()
+        # Both frames are only read, so they are used without copying.
+        self.df = df
+        self.sp500_returns = sp500_returns
         self.tickers = tickers
-        self.required_columns = {'close', 'volume', 'date'}
-        self._validate_columns()
-
-    def _validate_columns(self):
-        missing_cols = self.required_columns - set(self.df.columns)
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
+        validate_columns(REQUIRED_COLUMNS, {'market': df})
 
     def calculate_beta(self, window_size=62):
+        """
+        Calculate the rolling beta of the stock against the S&P 500 as
+        cov(stock, market) / var(market) over the window, aligned with self.df.
+        """
         # Compute stock returns from self.df.
-        stock_returns = self.df[['date', 'close']].copy()
-        stock_returns['stock_return'] = stock_returns['close'].pct_change()
+        stock_returns = self.df[['date', 'close']]
+        stock_returns = stock_returns.assign(stock_return=stock_returns['close'].pct_change())
         # Ensure sp500_returns has a 'date' column and a 'market_return' column.
-        market_returns = self.sp500_returns.copy()
+        market_returns = self.sp500_returns
         if 'changePercent' in market_returns.columns:
             market_returns = market_returns.rename(columns={'changePercent': 'market_return'})
         # Merge on date.
-        merged_df = pd.merge(stock_returns, market_returns, on='date', how='left')
+        merged_df = pd.merge(stock_returns, market_returns[['date', 'market_return']], on='date', how='left')
         merged_df.fillna(0, inplace=True)
-        merged_df.set_index('date', inplace=True)
-        # Compute rolling beta.
-        def calc_beta(window):
-            market_var = np.var(window['market_return'])
-            if market_var == 0:
-                return np.nan
-            return np.cov(window['stock_return'], window['market_return'])[0, 1] / market_var
-        beta_series = merged_df[['stock_return','market_return']].rolling(window=window_size).apply(
-            lambda x: calc_beta(pd.DataFrame(x.reshape(-1, 2), columns=['stock_return','market_return'])),
-            raw=True
-        )
-        # Use the stock_return column as beta; reindex to self.df dates.
-        beta_series = beta_series['stock_return']
-        beta_series = beta_series.reindex(self.df['date']).ffill()
-        return beta_series
+        # Compute rolling beta in one compiled pass over running moments; a flat market gives NaN.
+        beta = rolling_beta(merged_df['stock_return'].to_numpy(), merged_df['market_return'].to_numpy(), window_size)
+        return pd.Series(beta, index=self.df.index)
 
     # to be changed
     # def calculate_liquidity(self, window=60):
@@ -52,9 +61,10 @@ class Style:
     def calculate_growth(self, window=252):
         """
         Calculate growth as the cumulative log return over the window.
-        This is computed as: log(close) - log(close.shift(window)).
+        This is computed as: log(close) - log(close.shift(window)), taking the log once.
         """
-        return np.log(self.df['close']) - np.log(self.df['close'].shift(window))
+        log_close = np.log(self.df['close'])
+        return log_close - log_close.shift(window)
 
     # to be changed
     def calculate_momentum(self, window=252):
@@ -64,12 +74,36 @@ class Style:
         """
         return self.df['close'].pct_change(periods=window)
 
+    @classmethod
+    def panel(cls, close, market_return, window_size=62):
+        """
+        Calculate the style factors for many tickers at once from a price panel, without
+        building a Style and merging the market returns per ticker. Growth and momentum are
+        computed on the whole panel at once and the beta kernel runs column by column.
+
+        :param close: Close prices, one row per date and one column per ticker
+        :param market_return: S&P 500 daily returns as calculate_beta reads them (changePercent),
+                              indexed by the dates of close
+        :param window_size: Window of the rolling beta
+        :return: Dict of factor name to a DataFrame shaped like close
+        """
+        # As in calculate_beta, missing stock and market returns count as 0.
+        stock_return = close.pct_change().fillna(0).to_numpy()
+        market = np.broadcast_to(market_return.reindex(close.index).fillna(0).to_numpy()[:, None], close.shape)
+        growth, momentum = _growth_and_momentum(close.to_numpy(), 252)
+        factors = {
+            'beta': by_column(rolling_beta, [stock_return, market], window_size),
+            'growth': growth,
+            'momentum': momentum,
+        }
+        return {name: pd.DataFrame(values, index=close.index, columns=close.columns)
+                for name, values in factors.items()}
+
     def calculate_all_factors(self):
         try:
             all_factors = self.df[['date']].copy()
             all_factors['beta'] = self.calculate_beta()
-            all_factors['growth'] = self.calculate_growth()
-            all_factors['momentum'] = self.calculate_momentum()
+            all_factors['growth'], all_factors['momentum'] = _growth_and_momentum(self.df['close'].to_numpy(), 252)
             return all_factors
         except Exception as e:
             print(f"Error calculating style factors: {e}")
@@ -1,4 +1,20 @@
+import numpy as np
 import pandas as pd
+from .validation import validate_columns
+from .kernels import by_column, ewm_mean_diff, money_flow_sums, rolling_mean_var
+from .price_bundle import PriceBundle
+
+def _bands(rolling_mean, rolling_var, num_std=2):
+    band_width = np.sqrt(rolling_var) * num_std
+    return rolling_mean + band_width, rolling_mean - band_width
+
+def _money_flow_index(positive_flow_sum, negative_flow_sum):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        money_flow_ratio = positive_flow_sum / negative_flow_sum
+        return 100 - (100 / (1 + money_flow_ratio))
+
+# Columns the market data frame must have.
+REQUIRED_COLUMNS = {'market': frozenset({'close', 'high', 'low', 'volume'})}
 
 class Technical:
     """
@@ -6,48 +22,69 @@ class Technical:
     
     Attributes:
         df (pd.DataFrame): DataFrame containing OHLCV market data
+        prices (PriceBundle): Returns and rolling statistics shared with the other market factor classes
     """
-    def __init__(self, df):
+    def __init__(self, df, prices=None):
         self.df = df
-        self.required_columns = {'close', 'high', 'low', 'volume'}
-        self._validate_columns()
+        validate_columns(REQUIRED_COLUMNS, {'market': df})
+        self.prices = prices if prices is not None else PriceBundle(df)
+
+    def _mac(self, fast_span=36, slow_span=78):
+        return ewm_mean_diff(self.prices.close, fast_span, slow_span)
 
-    def _validate_columns(self):
-        missing_cols = self.required_columns - set(self.df.columns)
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
+    def _bollinger_bands(self, window=60, num_std=2):
+        rolling_mean, rolling_var = self.prices.close_stats(window)
+        return _bands(rolling_mean, rolling_var, num_std)
+
+    def _mfi(self, window=42):
+        positive_flow_sum, negative_flow_sum = money_flow_sums(
+            self.df['high'].to_numpy(), self.df['low'].to_numpy(), self.prices.close,
+            self.df['volume'].to_numpy(), window)
+        return _money_flow_index(positive_flow_sum, negative_flow_sum)
 
     def calculate_mac(self, fast_span=36, slow_span=78):
-        fast_ma = self.df['close'].ewm(span=fast_span).mean()
-        slow_ma = self.df['close'].ewm(span=slow_span).mean()
-        self.df['MAC60'] = fast_ma - slow_ma
+        self.df['MAC60'] = self._mac(fast_span, slow_span)
         return self.df
 
     def calculate_bollinger_bands(self, window=60, num_std=2):
-        rolling_mean = self.df['close'].rolling(window=window).mean()
-        rolling_std = self.df['close'].rolling(window=window).std()
-        self.df['boll_up'] = rolling_mean + (rolling_std * num_std)
-        self.df['boll_down'] = rolling_mean - (rolling_std * num_std)
+        self.df['boll_up'], self.df['boll_down'] = self._bollinger_bands(window, num_std)
         return self.df
 
     def calculate_mfi(self, window=42):
-        typical_price = (self.df['close'] + self.df['high'] + self.df['low']) / 3
-        raw_money_flow = typical_price * self.df['volume']
-        positive_flow = raw_money_flow.where(typical_price > typical_price.shift(1), 0)
-        negative_flow = raw_money_flow.where(typical_price < typical_price.shift(1), 0)
-        positive_flow_sum = positive_flow.rolling(window=window).sum()
-        negative_flow_sum = negative_flow.rolling(window=window).sum()
-        money_flow_ratio = positive_flow_sum / negative_flow_sum
-        self.df['MFI42'] = 100 - (100 / (1 + money_flow_ratio))
+        self.df['MFI42'] = self._mfi(window)
         return self.df
 
     def calculate_all_factors(self):
         try:
-            self.calculate_mac()
-            self.calculate_bollinger_bands()
-            self.calculate_mfi()
-            technical_columns = ['date','MAC60', 'boll_up', 'boll_down', 'MFI42']
-            return self.df[technical_columns]
+            # The result is built straight from the factor arrays; self.df is left unchanged.
+            boll_up, boll_down = self._bollinger_bands()
+            return pd.DataFrame({'date': self.df['date'], 'MAC60': self._mac(), 'boll_up': boll_up,
+                                 'boll_down': boll_down, 'MFI42': self._mfi()}, index=self.df.index)
         except Exception as e:
             print(f"Error calculating technical factors: {e}")
             return pd.DataFrame()
+
+    @classmethod
+    def panel(cls, high, low, close, volume):
+        """
+        Calculate the technical factors for many tickers at once from price panels, without
+        building a Technical and price bundle per ticker. The kernels run column by column.
+
+        :param high: High prices, one row per date and one column per ticker
+        :param low: Low prices aligned with high
+        :param close: Close prices aligned with high
+        :param volume: Volumes aligned with high
+        :return: Dict of factor name to a DataFrame shaped like close
+        """
+        close_float = close.to_numpy(dtype=np.float64)
+        boll_up, boll_down = _bands(*by_column(rolling_mean_var, [close_float], 60, outputs=2))
+        positive_flow_sum, negative_flow_sum = by_column(
+            money_flow_sums, [high.to_numpy(), low.to_numpy(), close_float, volume.to_numpy()], 42, outputs=2)
+        factors = {
+            'MAC60': by_column(ewm_mean_diff, [close_float], 36, 78),
+            'boll_up': boll_up,
+            'boll_down': boll_down,
+            'MFI42': _money_flow_index(positive_flow_sum, negative_flow_sum),
+        }
+        return {name: pd.DataFrame(values, index=close.index, columns=close.columns)
+                for name, values in factors.items()}
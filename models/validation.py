@@ -0,0 +1,15 @@
+def validate_columns(required, frames):
+    """
+    Check that every frame has its required columns.
+
+    :param required: Mapping of frame name to a frozenset of required column names
+    :param frames: Mapping of frame name to DataFrame
+    :raises ValueError: Listing each missing column as "frame: column"
+    """
+    missing_cols = []
+    for name, columns in required.items():
+        frame_columns = frames[name].columns
+        if not columns.issubset(frame_columns):
+            missing_cols.extend(f"{name}: {col}" for col in sorted(columns.difference(frame_columns)))
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {', '.join(missing_cols)}")
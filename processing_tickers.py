@@ -1,20 +1,24 @@
 import os
+import numpy as np
 import pandas as pd
 import concurrent.futures
 from data_sources.fmp import FMPWrapper
 from models.factors import FactorsWrapper
+from models.kernels import warm_up
 from sp500_constituents import SP500Constituents
+from config import FMP_CACHE_DIR, FMP_CACHE_TTL, FMP_PRICE_CACHE_TTL, FACTOR_CACHE_DIR
 
-def process_ticker(ticker, api_key, start_date, end_date):
+def process_ticker(ticker, api_key, start_date, end_date, fmp=None):
     """
     Processes a single ticker:
-      - Instantiates FMPWrapper and FactorsWrapper.
+      - Instantiates FactorsWrapper, with a new FMPWrapper unless a shared one is given as fmp.
       - Calculates all factors and merges them (using the quality factors’ dates as a base).
       - Filters the merged data by the given date range.
     """
     try:
-        fmp = FMPWrapper(api_key)
-        factors_wrapper = FactorsWrapper(ticker, fmp, start_date, end_date)
+        if fmp is None:
+            fmp = FMPWrapper(api_key, cache_dir=FMP_CACHE_DIR, cache_ttl=FMP_CACHE_TTL, price_cache_ttl=FMP_PRICE_CACHE_TTL)
+        factors_wrapper = FactorsWrapper(ticker, fmp, start_date, end_date, cache_dir=FACTOR_CACHE_DIR)
         factors = factors_wrapper.calculate_all_factors()
 
         quality_factors = factors.get("quality", pd.DataFrame())
@@ -22,43 +26,54 @@ def process_ticker(ticker, api_key, start_date, end_date):
             print(f"No quality factors found for {ticker}. Skipping.")
             return pd.DataFrame()
 
-        merged_factors = quality_factors[["date"]].copy()
+        merged_factors = quality_factors[["date"]].reset_index(drop=True)
         merged_factors["Ticker"] = ticker
+        dates = merged_factors["date"].to_numpy()
 
+        # Every category contributes, at each quality date, its latest row on or before that date
+        # with missing values carried forward. The rows are located by binary search and all
+        # categories are joined in a single concat rather than two merges per category.
+        blocks = [merged_factors]
         for factor_category, factor_values in factors.items():
             if isinstance(factor_values, pd.DataFrame) and "date" in factor_values.columns:
-                factor_values = factor_values.sort_values(by="date").ffill()
-                factor_values = pd.merge(
-                    merged_factors[["date"]],
-                    factor_values,
-                    on="date",
-                    how="outer"
-                ).ffill()
-                merged_factors = pd.merge(
-                    merged_factors,
-                    factor_values,
-                    on="date",
-                    how="left",
-                )
+                factor_values = factor_values.sort_values(by="date", kind="stable", ignore_index=True).ffill()
+                # Position -1 (no row yet) is not a label, so reindex leaves those rows missing.
+                positions = np.searchsorted(factor_values["date"].to_numpy(), dates, side="right") - 1
+                blocks.append(factor_values.drop(columns="date").reindex(positions).reset_index(drop=True))
             else:
                 print(f"Skipping {factor_category} for {ticker} as it does not contain a valid DataFrame with a 'date' column.")
+        merged_factors = pd.concat(blocks, axis=1)
 
         merged_factors = merged_factors[(merged_factors["date"] >= start_date) & (merged_factors["date"] <= end_date)]
-        return merged_factors
+        # The factors are computed in double precision where it matters (statements, volumes);
+        # the finished values are stored as float32, which halves what the final concat and
+        # CSV write have to move.
+        float64_columns = merged_factors.select_dtypes("float64").columns
+        return merged_factors.astype(dict.fromkeys(float64_columns, np.float32))
 
     except Exception as e:
         print(f"Error processing {ticker}: {e}")
         return pd.DataFrame()
 
-def process_tickers(tickers, api_key, start_date, end_date, max_workers=10):
+def process_tickers(tickers, api_key, start_date, end_date, max_workers=10, http_concurrency=None):
     """
     Processes multiple tickers concurrently and concatenates the results.
+    max_workers tickers are processed at once; http_concurrency, if given, separately caps the
+    FMP requests in flight across all of them, e.g. to stay under the API rate limit.
+    The tickers run on threads: the work is mostly waiting on the FMP API, and the factor
+    kernels release the GIL, so separate processes only add startup and pickling costs.
+    All tickers share one FMPWrapper, so they reuse its pooled keep-alive connections.
     """
     merged_factors_list = []
+    # Each ticker fetches its five endpoints concurrently; keep a pooled connection for each.
+    fmp = FMPWrapper(api_key, cache_dir=FMP_CACHE_DIR, cache_ttl=FMP_CACHE_TTL, price_cache_ttl=FMP_PRICE_CACHE_TTL,
+                     pool_size=max_workers * 5, max_concurrent_requests=http_concurrency)
+    # Compile the numba kernels once here rather than in whichever worker threads reach them first.
+    warm_up()
     
-    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
         future_to_ticker = {
-            executor.submit(process_ticker, ticker, api_key, start_date, end_date): ticker
+            executor.submit(process_ticker, ticker, api_key, start_date, end_date, fmp=fmp): ticker
             for ticker in tickers
         }
         for future in concurrent.futures.as_completed(future_to_ticker):
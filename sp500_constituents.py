@@ -8,9 +8,10 @@ This module builds a quarterly timeline of S&P 500 constituents based on their a
 recording snapshots only for quarters from the output_start_year onward.
 """
 
+import numpy as np
 import pandas as pd
-from datetime import datetime
 from data_sources.fmp import FMPWrapper
+from config import FMP_CACHE_DIR, FMP_CACHE_TTL, FMP_PRICE_CACHE_TTL
 
 class SP500Constituents:
     def __init__(self, api_key, output_start_year=2004, end_year=2024):
@@ -22,7 +23,9 @@ class SP500Constituents:
         self.api_key = api_key
         self.output_start_year = output_start_year
         self.end_year = end_year
-        self.fmp = FMPWrapper(api_key)
+        # Through the on-disk FMP cache, so reruns reuse the constituent list for FMP_CACHE_TTL.
+        self.fmp = FMPWrapper(api_key, cache_dir=FMP_CACHE_DIR, cache_ttl=FMP_CACHE_TTL,
+                              price_cache_ttl=FMP_PRICE_CACHE_TTL)
     
     def fetch_historical_data(self):
         """
@@ -49,37 +52,46 @@ class SP500Constituents:
         Returns:
             A dictionary mapping quarterly boundary dates (as strings) to sorted lists of constituent tickers.
         """
-        # Convert each record's "dateFirstAdded" to a datetime field.
-        for record in changes:
-            if "dateFirstAdded" in record:
-                try:
-                    record["date_dt"] = pd.to_datetime(record["dateFirstAdded"])
-                except Exception as e:
-                    print(f"Error parsing date in record {record}: {e}")
-                    record["date_dt"] = pd.NaT
-            else:
-                record["date_dt"] = pd.NaT
+        # Convert every record's "dateFirstAdded" to a datetime field in one call.
+        added = pd.Series([record.get("dateFirstAdded") for record in changes], dtype=object)
+        dates = pd.to_datetime(added, errors="coerce", format="mixed", cache=True)
+        for record, date_dt in zip(changes, dates):
+            if pd.isnull(date_dt) and pd.notnull(record.get("dateFirstAdded")):
+                print(f"Error parsing date in record {record}")
+            record["date_dt"] = date_dt
         
-        # Sort records chronologically.
-        changes_sorted = sorted(changes, key=lambda x: x["date_dt"] if pd.notnull(x["date_dt"]) else datetime.min)
+        # Sort the dated records chronologically; records without a date are never added.
+        dated = [record for record in changes if pd.notnull(record["date_dt"])]
+        change_dates = np.array([record["date_dt"] for record in dated], dtype="datetime64[ns]")
+        order = np.argsort(change_dates, kind="stable")
+        # Every symbol as an id into the sorted array of all symbols, so a snapshot is a boolean
+        # mask over that array and comes out sorted without sorting; -1 marks a missing symbol.
+        symbol_ids, all_symbols = pd.factorize(
+            np.array([dated[i].get("symbol") or None for i in order], dtype=object), sort=True)
         
         quarterly_dates = self.generate_quarterly_dates(f"{self.output_start_year}-01-01", f"{self.end_year}-12-31")
+        quarters = pd.DatetimeIndex(quarterly_dates)
+        # Number of addition events up to (and including) each quarterly date, in one binary search.
+        cuts = np.searchsorted(change_dates[order], quarters.to_numpy(dtype="datetime64[ns]"), side="right")
+        # Keys and years of all quarters at once rather than per quarter in the loop.
+        quarter_keys = quarters.strftime("%Y-%m-%d")
+        quarter_years = quarters.year
         timeline = {}
-        current_constituents = set()
+        current_constituents = np.zeros(len(all_symbols), dtype=bool)
+        snapshot = []
         change_index = 0
-        num_changes = len(changes_sorted)
         
-        for q_date in quarterly_dates:
-            # Apply all addition events up to (and including) the current quarterly date.
-            while change_index < num_changes and changes_sorted[change_index]["date_dt"] <= q_date:
-                record = changes_sorted[change_index]
-                if "symbol" in record and record["symbol"]:
-                    current_constituents.add(record["symbol"])
-                change_index += 1
+        for key, year, cut in zip(quarter_keys, quarter_years, cuts):
+            # Apply the addition events since the previous quarterly date; rebuild the snapshot only then.
+            if cut > change_index:
+                added = symbol_ids[change_index:cut]
+                current_constituents[added[added >= 0]] = True
+                snapshot = all_symbols[current_constituents].tolist()
+                change_index = cut
             
             # Record snapshot if the quarter is within our output range.
-            if q_date.year >= self.output_start_year:
-                timeline[q_date.strftime("%Y-%m-%d")] = sorted(list(current_constituents))
+            if year >= self.output_start_year:
+                timeline[key] = list(snapshot)
         
         return timeline
 